@@ -0,0 +1,178 @@
+# benchmarks/bench_pipeline.py
+"""Scaling benchmarks for the topology and analysis pipeline
+
+Sweeps cluster size (zones), dependency density and maxdim. Every case
+runs in a fresh worker process so its peak RSS is its own; ripser time is
+measured separately from total wall time by wrapping ``ripser.ripser``
+inside that worker. Run with tdak installed (``pip install -e .``).
+
+    python benchmarks/bench_pipeline.py --zones 3 30 300 --maxdim 0 1 -o new.json
+    python benchmarks/bench_pipeline.py --compare old.json new.json
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def run_case(zones, density, maxdim, seed=0):
+    """Time one generate -> persistence -> analyze pass in this process"""
+    import numpy as np
+    import ripser
+    from tdak.analysis import ClusterAnalyzer
+    from tdak.network import ClusterGenerator, DependencyTable
+    from tdak.topology import TopologyAnalyzer
+
+    ripser_time = [0.0]
+    ripser_fn = ripser.ripser
+
+    def timed_ripser(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return ripser_fn(*args, **kwargs)
+        finally:
+            ripser_time[0] += time.perf_counter() - start
+    ripser.ripser = timed_ripser
+
+    rss_start = _peak_rss_mb()
+    gen = ClusterGenerator(zones, seed=seed)
+    nodes = gen.generate_cluster(as_table=True)
+    deps = gen.service_deps
+    extra = int(density * len(nodes))
+    if extra:
+        # Extra random dependencies on top of the generator's ingress mesh
+        rng = np.random.default_rng(seed)
+        src, tgt = rng.integers(0, len(nodes), (2, extra))
+        deps = DependencyTable(
+            np.concatenate([deps.endpoints[deps.sources], nodes.names[src]]),
+            np.concatenate([deps.endpoints[deps.targets], nodes.names[tgt]]),
+            np.concatenate([deps.latency_ms, rng.choice([10.0, 150.0], extra)]),
+        )
+
+    topo, analyzer = TopologyAnalyzer(), ClusterAnalyzer()
+    timings = {}
+    start = time.perf_counter()
+    metric = topo.compute_metric_persistence(nodes, maxdim=maxdim)
+    timings["metric_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    network = topo.compute_network_persistence(deps, sparse=True, maxdim=maxdim)
+    timings["network_s"] = time.perf_counter() - start
+    start = time.perf_counter()
+    analyzer.analyze(metric, metric, network, network, "none", nodes)
+    timings["analyze_s"] = time.perf_counter() - start
+
+    return {
+        "zones": zones,
+        "density": density,
+        "maxdim": maxdim,
+        "nodes": len(nodes),
+        "dependencies": len(deps),
+        **timings,
+        "wall_s": sum(timings.values()),
+        "ripser_s": ripser_time[0],
+        "peak_rss_mb": _peak_rss_mb(),
+        "rss_growth_mb": _peak_rss_mb() - rss_start,
+    }
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_isolated(args):
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(1, maxtasksperchild=1) as pool:
+        return pool.apply(run_case, args)
+
+
+def sweep(zones, densities, maxdims, budget_s, seed=0):
+    """Run every case, skipping larger clusters once a smaller one blew the budget"""
+    results = []
+    for density, maxdim in itertools.product(densities, maxdims):
+        for z in sorted(zones):
+            case = _run_isolated((z, density, maxdim, seed))
+            results.append(case)
+            print(f"zones={z:<5} density={density:<4} maxdim={maxdim} nodes={case['nodes']:<6} "
+                  f"wall={case['wall_s']:.3f}s ripser={case['ripser_s']:.3f}s "
+                  f"rss={case['peak_rss_mb']:.0f}MB", file=sys.stderr)
+            if case["wall_s"] > budget_s:
+                break
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new, tolerance):
+    """Cases whose wall time, ripser time or peak RSS grew beyond tolerance"""
+    key = lambda case: (case["zones"], case["density"], case["maxdim"])
+    baseline = {key(case): case for case in old["results"]}
+    regressions = []
+    for case in new["results"]:
+        before = baseline.get(key(case))
+        if before is None:
+            continue
+        for field in ("wall_s", "ripser_s", "peak_rss_mb"):
+            if before[field] > 0 and case[field] > before[field] * (1 + tolerance):
+                regressions.append({
+                    "case": dict(zip(("zones", "density", "maxdim"), key(case))),
+                    "field": field,
+                    "before": before[field],
+                    "after": case[field],
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--zones", type=int, nargs="+", default=[3, 10, 30, 100, 300, 1000])
+    parser.add_argument("--density", type=float, nargs="+", default=[0.0, 2.0],
+                        help="Extra random dependencies per node")
+    parser.add_argument("--maxdim", type=int, nargs="+", default=[0, 1, 2])
+    parser.add_argument("--budget", type=float, default=60.0,
+                        help="Stop growing a sweep once a case exceeds this many seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", help="Write results JSON here (default stdout)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"),
+                        help="Compare two result files and exit non-zero on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown/growth when comparing")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f_old, open(args.compare[1]) as f_new:
+            regressions = compare(json.load(f_old), json.load(f_new), args.tolerance)
+        print(json.dumps(regressions, indent=2))
+        sys.exit(1 if regressions else 0)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": sweep(args.zones, args.density, args.maxdim, args.budget, args.seed),
+    }
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
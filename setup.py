@@ -1,15 +1,20 @@
 from setuptools import setup, find_packages
 
+# Only needed for diagram plots (tdak-demo, ``tdak analyze --plot``)
+PLOT_REQUIREMENTS = ["persim==0.3.1", "matplotlib>=3.5.0"]
+
 with open("requirements.txt") as f:
-    requirements = f.read().splitlines()
+    requirements = [r for r in f.read().splitlines() if r not in PLOT_REQUIREMENTS]
 
 setup(
     name="tdak",
     version="0.1.0",
     packages=find_packages(),
     install_requires=requirements,
+    extras_require={"plot": PLOT_REQUIREMENTS},
     entry_points={
         "console_scripts": [
+            "tdak=tdak.cli:main",
             "tdak-demo=tdak.demo:main",  # ¡set up the commad
         ],
     }
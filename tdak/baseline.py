@@ -0,0 +1,201 @@
+# tdak/baseline.py
+import math
+from tdak.topology import TopologyAnalyzer
+
+# (source, dimension, statistic) triples tracked by RollingBaseline
+FEATURES = tuple((source, dim, stat)
+                 for source in ('metric', 'network')
+                 for dim in ('h0', 'h1')
+                 for stat in ('wasserstein', 'entropy_diff'))
+
+
+class RunningStats:
+    """Welford's online mean and variance"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """Streaming quantile estimate in O(1) memory (Jain & Chlamtac's P² algorithm)
+
+    Five markers track the minimum, the p/2, p and (1+p)/2 quantiles and
+    the maximum; each update nudges the middle markers along a piecewise
+    parabola fitted through their neighbours.
+    """
+
+    def __init__(self, p):
+        if not 0 < p < 1:
+            raise ValueError("p must be in (0, 1)")
+        self.p = p
+        self.count = 0
+        self._heights = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0, 2 * p, 4 * p, 2 + 2 * p, 4]
+        self._increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def update(self, x):
+        self.count += 1
+        q = self._heights
+        if self.count <= 5:
+            q.append(x)
+            q.sort()
+            return
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = max(i for i in range(4) if q[i] <= x)
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self._desired[i] += self._increments[i]
+
+        for i in (1, 2, 3):
+            d = self._desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    @property
+    def value(self):
+        if not self._heights:
+            return None
+        if self.count <= 5:
+            return self._heights[min(len(self._heights) - 1, int(self.p * len(self._heights)))]
+        return self._heights[2]
+
+
+class RollingBaseline:
+    """Streaming model of normal snapshot-to-snapshot topology change
+
+    Each snapshot is summarized by the Wasserstein and entropy deltas of
+    metric and network H0/H1 against the previous normal snapshot (the
+    same numbers ``ClusterAnalyzer.analyze`` reports). Every feature keeps
+    Welford running statistics and P² quantile estimates, so scoring and
+    updating are O(1) in the history length and no old diagram is ever
+    recomputed. Only the last normal diagram set is kept, as the
+    reference for the next comparison (``reference()``).
+
+    A snapshot's ``score`` is its largest z-score over the features.
+    Wasserstein distances are never negative and only an increase is
+    suspicious, so their z-scores are one-sided (clipped at 0); signed
+    features such as ``entropy_diff`` count in both directions.
+    Snapshots scoring above ``threshold`` once ``warmup`` snapshots were
+    absorbed are flagged and kept out of the baseline.
+    Standard deviations are floored at ``tolerance`` (in feature units), so
+    after a run of identical snapshots any change larger than
+    ``threshold * tolerance`` is flagged rather than scoring zero.
+    """
+
+    def __init__(self, quantiles=(0.5, 0.95, 0.99), threshold=4.0, warmup=10,
+                 tolerance=1e-2, topology=None):
+        self._reference = None
+        self.threshold = threshold
+        self.tolerance = tolerance
+        self.warmup = warmup
+        self.topology = topology or TopologyAnalyzer()
+        self.stats = {f: RunningStats() for f in FEATURES}
+        self.quantiles = {f: {p: P2Quantile(p) for p in quantiles} for f in FEATURES}
+
+    @property
+    def count(self):
+        return self.stats[FEATURES[0]].count
+
+    def reference(self):
+        """Most recent normal ``(metric_dgms, network_dgms)``, None before the first"""
+        return self._reference
+
+    def seed(self, diagrams):
+        """Make ``(metric_dgms, network_dgms)`` the reference without scoring it"""
+        self._reference = diagrams
+
+    def score(self, deltas):
+        """Score a report (or ``{feature: value}`` mapping) against the baseline
+
+        Returns a dict with the overall ``score``, per-feature ``zscores``
+        and the features above each tracked quantile; ``anomalous`` is only
+        ever set once the baseline is warmed up.
+        """
+        values = _feature_values(deltas)
+        zscores = {}
+        for f, x in values.items():
+            s = self.stats[f]
+            z = (x - s.mean) / max(s.std, self.tolerance)
+            zscores[f] = max(z, 0.0) if f[2] == 'wasserstein' else z
+        above = {p: [f for f, x in values.items()
+                     if self.quantiles[f][p].value is not None and x > self.quantiles[f][p].value]
+                 for p in next(iter(self.quantiles.values()))}
+        score = max((abs(z) for z in zscores.values()), default=0.0)
+        return {
+            "score": score,
+            "anomalous": self.count >= self.warmup and score > self.threshold,
+            "zscores": {"/".join(f): z for f, z in zscores.items()},
+            "above_quantile": {p: ["/".join(f) for f in fs] for p, fs in above.items()},
+        }
+
+    def update(self, deltas):
+        """Absorb a normal snapshot's deltas (O(1))"""
+        for f, x in _feature_values(deltas).items():
+            self.stats[f].update(x)
+            for estimator in self.quantiles[f].values():
+                estimator.update(x)
+
+    def observe(self, deltas, diagrams=None):
+        """Score, then absorb the snapshot unless it was flagged
+
+        ``diagrams`` (``(metric_dgms, network_dgms)``) become the new
+        reference when the snapshot is absorbed.
+        """
+        result = self.score(deltas)
+        if not result["anomalous"]:
+            self.update(deltas)
+            if diagrams is not None:
+                self._reference = diagrams
+        return result
+
+    def push(self, metric_dgms, network_dgms):
+        """``observe`` for a bare diagram set, comparing it with ``reference()``
+
+        The first snapshot only seeds the reference and returns None.
+        """
+        reference = self.reference()
+        if reference is None:
+            self.seed((metric_dgms, network_dgms))
+            return None
+        deltas = {
+            'metric': self.topology.analyze_changes(reference[0], metric_dgms),
+            'network': self.topology.analyze_changes(reference[1], network_dgms),
+        }
+        return self.observe(deltas, (metric_dgms, network_dgms))
+
+
+def _feature_values(deltas):
+    return {(source, dim, stat): float(deltas[source][dim][stat])
+            for source, dim, stat in FEATURES}
@@ -0,0 +1,200 @@
+# tdak/cli.py
+"""Headless ``tdak`` command
+
+Every subcommand writes newline-delimited JSON to stdout (or ``-o``), one
+object per line with a ``type`` field, so output can be piped into jq or a
+log shipper. Only the standard library is imported at startup; NumPy, the
+persistence stack and, with ``--plot``, matplotlib load inside the
+subcommand that needs them.
+
+``--maxdim`` defaults to 0: exact H0 from spanning trees (a KD-tree
+Borůvka pass over the node metrics, Kruskal over the dependency edges),
+O(n log n) and without ripser. ``--maxdim 1`` or higher opts into ripser
+for loops and voids, whose cost grows far faster with cluster size.
+
+    tdak analyze zone_outage --zones 10
+    tdak replay history/ --start 2024-01-01T00:00 --save
+    tdak bench --trials 20 --maxdim 1
+"""
+import argparse
+import json
+import math
+import sys
+
+FAILURE_CHOICES = ('zone_outage', 'storage_failure', 'network_congestion',
+                   'dns_failure', 'pod_overload')
+
+
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        return args.handler(args, out, parser)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog='tdak', description='Topological Kubernetes failure detection',
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-o', '--output', help='Write NDJSON here instead of stdout')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', help='Simulate one failure and report on it')
+    analyze.add_argument('failure', choices=FAILURE_CHOICES, help='Failure type to simulate')
+    analyze.add_argument('--zones', type=int, default=3, help='Number of availability zones')
+    analyze.add_argument('--seed', type=int, help='Seed for a reproducible cluster')
+    analyze.add_argument('--maxdim', type=int, default=0,
+                         help='Highest homology dimension (default 0: exact H0 without '
+                              'ripser; 1+ runs ripser, much slower on large clusters)')
+    analyze.add_argument('--store', help='Also append both snapshots to this snapshot store')
+    analyze.add_argument('--profile', action='store_true',
+                         help='Emit per-stage metrics as a final record')
+    analyze.add_argument('--plot', metavar='PNG',
+                         help="Save persistence diagrams here (needs the 'plot' extra)")
+    analyze.set_defaults(handler=_analyze)
+
+    replay = commands.add_parser('replay', help='Analyze consecutive snapshots from a store')
+    replay.add_argument('store', help='Snapshot store directory')
+    replay.add_argument('--start', help='First timestamp (ISO 8601, inclusive)')
+    replay.add_argument('--end', help='Last timestamp (ISO 8601, exclusive)')
+    replay.add_argument('--maxdim', type=int, default=0,
+                        help='Homology dimension for diagrams missing from the store')
+    replay.add_argument('--save', action='store_true',
+                        help='Write diagrams computed during replay back to the store')
+    replay.set_defaults(handler=_replay)
+
+    bench = commands.add_parser('bench', help='Time the pipeline stages over seeded trials')
+    bench.add_argument('--trials', type=int, default=10)
+    bench.add_argument('--zones', type=int, default=3)
+    bench.add_argument('--maxdim', type=int, default=0,
+                       help='Highest homology dimension (1+ runs ripser)')
+    bench.add_argument('--failure', choices=FAILURE_CHOICES, default='zone_outage')
+    bench.add_argument('--seed', type=int, default=0)
+    bench.set_defaults(handler=_bench)
+    return parser
+
+
+def _analyze(args, out, parser):
+    if args.plot:
+        try:
+            import matplotlib
+        except ImportError:
+            parser.error("--plot needs the 'plot' extra: pip install 'tdak[plot]'")
+        matplotlib.use('Agg')
+
+    from tdak.analysis import ClusterAnalyzer
+    from tdak.metrics import MetricsRegistry
+    from tdak.network import ClusterGenerator
+    from tdak.topology import TopologyAnalyzer
+
+    metrics = MetricsRegistry() if args.profile else None
+    gen = ClusterGenerator(args.zones, seed=args.seed)
+    topo = TopologyAnalyzer(metrics=metrics)
+    analyzer = ClusterAnalyzer(metrics=metrics)
+
+    nodes = gen.generate_cluster(as_table=True)
+    metric_initial = topo.compute_metric_persistence(nodes, maxdim=args.maxdim)
+    network_initial = topo.compute_network_persistence(gen.service_deps, sparse=True,
+                                                       maxdim=args.maxdim)
+    deps_initial = gen.service_deps.copy()
+    failed_nodes = gen.inject_failure(nodes, args.failure)
+    metric_failed = topo.compute_metric_persistence(failed_nodes, maxdim=args.maxdim)
+    network_failed = topo.compute_network_persistence(gen.service_deps, sparse=True,
+                                                      maxdim=args.maxdim)
+
+    report = analyzer.analyze(metric_initial, metric_failed, network_initial,
+                              network_failed, args.failure, failed_nodes)
+    _emit(out, 'report', nodes=len(nodes), zones=args.zones, maxdim=args.maxdim,
+          detected=bool(analyzer.validate_signature(report, args.failure)), **report)
+
+    if args.store:
+        from datetime import datetime, timezone
+        from tdak.store import SnapshotStore
+
+        now = datetime.now(timezone.utc)
+        with SnapshotStore(args.store, 'a') as store:
+            store.append(now, nodes, deps_initial,
+                         {'metric': metric_initial, 'network': network_initial})
+            store.append(now, failed_nodes, gen.service_deps,
+                         {'metric': metric_failed, 'network': network_failed})
+    if metrics is not None:
+        _emit(out, 'profile', prometheus=metrics.render())
+    if args.plot:
+        _plot(args.plot, metric_failed, network_failed)
+    return 0
+
+
+def _replay(args, out, parser):
+    from tdak.analysis import ClusterAnalyzer
+    from tdak.network import FAILURE_TYPES
+    from tdak.store import SnapshotStore
+    from tdak.topology import TopologyAnalyzer
+
+    store = SnapshotStore(args.store, 'a' if args.save else 'r')
+    analyzer = ClusterAnalyzer()
+    previous = None
+    for timestamp, nodes, deps, dgms in store.replay(args.start, args.end,
+                                                     topology=TopologyAnalyzer(),
+                                                     maxdim=args.maxdim):
+        if previous is not None:
+            report = analyzer.analyze(previous['metric'], dgms['metric'], previous['network'],
+                                      dgms['network'], None, nodes)
+            detected = [ft for ft in FAILURE_TYPES if analyzer.validate_signature(report, ft)]
+            _emit(out, 'report', timestamp=str(timestamp), nodes=len(nodes),
+                  detected=detected, **report)
+        previous = dgms
+    return 0
+
+
+def _bench(args, out, parser):
+    from tdak.evaluation import STAGES, run_trial
+
+    totals = dict.fromkeys(STAGES, 0.0)
+    for seed in range(args.seed, args.seed + args.trials):
+        result = run_trial(seed, args.failure, args.zones, args.maxdim)
+        _emit(out, 'trial', seed=seed, **result)
+        for stage, seconds in result['timings'].items():
+            totals[stage] += seconds
+    _emit(out, 'summary', trials=args.trials, zones=args.zones, maxdim=args.maxdim,
+          mean_ms={stage: 1e3 * t / max(1, args.trials) for stage, t in totals.items()})
+    return 0
+
+
+def _plot(path, metric, network):
+    import matplotlib.pyplot as plt
+    from persim import plot_diagrams
+
+    plt.figure(figsize=(15, 6))
+    plt.subplot(121, title="Resource Metric Persistence")
+    plot_diagrams(list(metric))  # persim needs a real list of diagrams
+    plt.subplot(122, title="Network Connectivity Persistence")
+    if any(len(d) > 0 for d in network):
+        plot_diagrams(list(network))
+    plt.tight_layout()
+    plt.savefig(path, dpi=150)
+
+
+def _emit(out, record_type, **fields):
+    out.write(json.dumps({'type': record_type, **_jsonable(fields)}) + '\n')
+    out.flush()
+
+
+def _jsonable(value):
+    """NumPy scalars and arrays to plain JSON; NaN and infinities become null"""
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if hasattr(value, 'tolist'):  # NumPy array or scalar
+        return _jsonable(value.tolist())
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+if __name__ == '__main__':
+    sys.exit(main())
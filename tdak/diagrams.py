@@ -0,0 +1,135 @@
+# tdak/diagrams.py
+import numpy as np
+
+
+class PersistenceDiagramSet:
+    """Persistence diagrams of every homology dimension in one float32 buffer
+
+    Behaves like the list of ``(k, 2)`` arrays ripser returns: ``len`` is
+    the number of dimensions and ``dgms[dim]`` a read-only view into the
+    shared buffer, so existing consumers keep working. Points are stored
+    once, in float32 (half the memory of ripser's float64 output), and are
+    immutable, which makes sets safe to share through caches. Lifetimes,
+    persistence entropy and total persistence are computed on first use
+    and kept, so a report that asks for them repeatedly pays once.
+
+    ``to_bytes`` / ``from_bytes`` is a flat header-plus-buffer encoding,
+    also used for pickling.
+    """
+
+    __slots__ = ('_points', '_offsets', '_lifetimes', '_entropy', '_total')
+
+    def __init__(self, points, offsets):
+        self._points = points
+        self._offsets = offsets
+        dims = len(offsets) - 1
+        self._lifetimes = [None] * dims
+        self._entropy = [None] * dims
+        self._total = [None] * dims
+
+    @classmethod
+    def from_diagrams(cls, diagrams):
+        """Pack a sequence of per-dimension diagrams; sets are returned as is
+
+        Anything that is not an array of ``(birth, death)`` pairs packs as
+        an empty diagram.
+        """
+        if isinstance(diagrams, cls):
+            return diagrams
+        arrays = [_as_points(d) for d in diagrams]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([len(a) for a in arrays], out=offsets[1:])
+        points = (np.concatenate(arrays, dtype=np.float32) if arrays
+                  else np.empty((0, 2), dtype=np.float32))
+        points.flags.writeable = False
+        return cls(points, offsets)
+
+    @classmethod
+    def empty(cls, maxdim):
+        """Empty diagrams for H0 .. Hmaxdim"""
+        return cls.from_diagrams([()] * (maxdim + 1))
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, dim):
+        if isinstance(dim, slice):
+            return [self[d] for d in range(*dim.indices(len(self)))]
+        if dim < 0:
+            dim += len(self)
+        if not 0 <= dim < len(self):
+            raise IndexError(f"No H{dim} diagram in a set of {len(self)}")
+        return self._points[self._offsets[dim]:self._offsets[dim + 1]]
+
+    def __iter__(self):
+        return (self[d] for d in range(len(self)))
+
+    def __repr__(self):
+        sizes = ', '.join(f"H{d}: {self._offsets[d + 1] - self._offsets[d]}"
+                          for d in range(len(self)))
+        return f"PersistenceDiagramSet({sizes})"
+
+    def dimension(self, dim):
+        """The Hdim diagram, or an empty one when the set stops below ``dim``"""
+        return self[dim] if 0 <= dim < len(self) else _EMPTY
+
+    def lifetimes(self, dim):
+        """``death - birth`` of each Hdim point (float64, cached)"""
+        if dim >= len(self):
+            return np.empty(0)
+        if self._lifetimes[dim] is None:
+            d = self[dim].astype(float)
+            self._lifetimes[dim] = d[:, 1] - d[:, 0]
+        return self._lifetimes[dim]
+
+    def entropy(self, dim):
+        """Persistence entropy of the finite, non-zero Hdim lifetimes (cached)"""
+        if dim >= len(self):
+            return 0.0
+        if self._entropy[dim] is None:
+            lifetimes = self.lifetimes(dim)
+            lifetimes = lifetimes[np.isfinite(lifetimes) & (lifetimes > 1e-9)]  # numerical zeros
+            if len(lifetimes) == 0:
+                self._entropy[dim] = 0.0
+            else:
+                probabilities = lifetimes / lifetimes.sum()
+                self._entropy[dim] = float(-np.sum(probabilities * np.log(probabilities + 1e-9)))
+        return self._entropy[dim]
+
+    def total_persistence(self, dim):
+        """Sum of the finite Hdim lifetimes (cached)"""
+        if dim >= len(self):
+            return 0.0
+        if self._total[dim] is None:
+            lifetimes = self.lifetimes(dim)
+            self._total[dim] = float(lifetimes[np.isfinite(lifetimes)].sum())
+        return self._total[dim]
+
+    @property
+    def nbytes(self):
+        return self._points.nbytes + self._offsets.nbytes
+
+    def to_bytes(self):
+        header = np.concatenate([[len(self._offsets)], self._offsets]).astype('<i8')
+        return header.tobytes() + self._points.astype('<f4', copy=False).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data):
+        count = int(np.frombuffer(data, '<i8', count=1)[0])
+        offsets = np.frombuffer(data, '<i8', count=count, offset=8).astype(np.int64)
+        points = np.frombuffer(data, '<f4', offset=8 * (count + 1)).reshape(-1, 2)
+        return cls(points, offsets)  # frombuffer over bytes is already read-only
+
+    def __reduce__(self):
+        return PersistenceDiagramSet.from_bytes, (self.to_bytes(),)
+
+
+def _as_points(diagram):
+    diagram = np.asarray(diagram)
+    if diagram.size == 0 or diagram.ndim != 2 or diagram.shape[1] != 2:
+        return np.empty((0, 2), dtype=np.float32)
+    return diagram
+
+
+_EMPTY = np.empty((0, 2), dtype=np.float32)
+_EMPTY.flags.writeable = False
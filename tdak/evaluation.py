@@ -0,0 +1,170 @@
+# tdak/evaluation.py
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from tdak.analysis import ClusterAnalyzer
+from tdak.network import FAILURE_TYPES, ClusterGenerator
+from tdak.topology import TopologyAnalyzer
+
+STAGES = (
+    "generate", "metric_before", "network_before", "inject",
+    "metric_after", "network_after", "analyze", "detect",
+)
+
+# Label for control trials where nothing is injected
+NO_FAILURE = "none"
+
+
+def run_trial(seed, failure_type, num_zones=3, maxdim=1):
+    """One seeded generate -> inject -> persistence -> analyze run
+
+    Returns the injected failure type, which signatures fired and the
+    wall time of every pipeline stage.
+    """
+    timings = {}
+    clock = time.perf_counter
+
+    start = clock()
+    gen = ClusterGenerator(num_zones, seed=seed)
+    nodes = gen.generate_cluster(as_table=True)
+    timings["generate"] = clock() - start
+
+    topo, analyzer = TopologyAnalyzer(), ClusterAnalyzer()
+    start = clock()
+    metric_before = topo.compute_metric_persistence(nodes, maxdim=maxdim)
+    timings["metric_before"] = clock() - start
+    start = clock()
+    network_before = topo.compute_network_persistence(gen.service_deps, maxdim=maxdim)
+    timings["network_before"] = clock() - start
+
+    start = clock()
+    failed = gen.inject_failure(nodes, failure_type)
+    timings["inject"] = clock() - start
+
+    start = clock()
+    metric_after = topo.compute_metric_persistence(failed, maxdim=maxdim)
+    timings["metric_after"] = clock() - start
+    start = clock()
+    network_after = topo.compute_network_persistence(gen.service_deps, maxdim=maxdim)
+    timings["network_after"] = clock() - start
+
+    start = clock()
+    report = analyzer.analyze(metric_before, metric_after, network_before,
+                              network_after, failure_type, failed)
+    timings["analyze"] = clock() - start
+
+    start = clock()
+    detected = {ft: bool(analyzer.validate_signature(report, ft)) for ft in FAILURE_TYPES}
+    timings["detect"] = clock() - start
+
+    return {"failure_type": failure_type, "detected": detected, "timings": timings}
+
+
+def _run_batch(args):
+    return [run_trial(seed, ft, num_zones, maxdim) for seed, ft, num_zones, maxdim in args]
+
+
+def wilson_interval(successes, total, z=1.96):
+    """Wilson score interval for a binomial proportion"""
+    if total == 0:
+        return 0.0, 1.0
+    p = successes / total
+    denom = 1 + z**2 / total
+    center = (p + z**2 / (2 * total)) / denom
+    half = z * np.sqrt(p * (1 - p) / total + z**2 / (4 * total**2)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+class MonteCarloEvaluator:
+    """Parallel precision/recall estimation for signature-based detection
+
+    Trials are seeded ``seed, seed + 1, ...`` and cycle through the failure
+    types (plus optional no-failure controls), so a run is reproducible for
+    a given configuration. Batches are dispatched to a process pool until
+    ``max_trials`` is reached or every precision/recall confidence interval
+    is narrower than ``ci_width``.
+    """
+
+    def __init__(self, failure_types=None, num_zones=3, maxdim=1, include_controls=True,
+                 n_jobs=1, batch_size=64, seed=0):
+        self.failure_types = list(failure_types or FAILURE_TYPES)
+        self.trial_types = self.failure_types + ([NO_FAILURE] if include_controls else [])
+        self.num_zones = num_zones
+        self.maxdim = maxdim
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else max(1, n_jobs)
+        self.batch_size = batch_size
+        self.seed = seed
+
+    def run(self, max_trials=1000, min_trials=100, ci_width=0.1):
+        """Run trials until the intervals settle; returns ``summary()``"""
+        confusion = {ft: {"true_pos": 0, "false_pos": 0, "false_neg": 0}
+                     for ft in self.failure_types}
+        timings = {stage: [] for stage in STAGES}
+        trials = 0
+
+        pool = ProcessPoolExecutor(self.n_jobs) if self.n_jobs > 1 else None
+        try:
+            while trials < max_trials:
+                count = min(self.batch_size * self.n_jobs, max_trials - trials)
+                args = [(self.seed + i, self.trial_types[i % len(self.trial_types)],
+                         self.num_zones, self.maxdim)
+                        for i in range(trials, trials + count)]
+                chunks = [args[k::self.n_jobs] for k in range(self.n_jobs)]
+                batches = pool.map(_run_batch, chunks) if pool else [_run_batch(args)]
+                for result in (r for batch in batches for r in batch):
+                    self._record(result, confusion, timings)
+                trials += count
+                if trials >= min_trials and self._settled(confusion, ci_width):
+                    break
+        finally:
+            if pool:
+                pool.shutdown()
+
+        return self.summary(confusion, timings, trials)
+
+    def _record(self, result, confusion, timings):
+        actual = result["failure_type"]
+        for ft, fired in result["detected"].items():
+            if ft not in confusion:
+                continue
+            if fired and ft == actual:
+                confusion[ft]["true_pos"] += 1
+            elif fired:
+                confusion[ft]["false_pos"] += 1
+            elif ft == actual:
+                confusion[ft]["false_neg"] += 1
+        for stage, seconds in result["timings"].items():
+            timings[stage].append(seconds)
+
+    def _settled(self, confusion, ci_width):
+        for counts in confusion.values():
+            tp, fp, fn = counts["true_pos"], counts["false_pos"], counts["false_neg"]
+            low, high = wilson_interval(tp, tp + fn)
+            if high - low > ci_width:
+                return False
+            if tp + fp:
+                low, high = wilson_interval(tp, tp + fp)
+                if high - low > ci_width:
+                    return False
+        return True
+
+    def summary(self, confusion, timings, trials):
+        metrics = {}
+        for ft, counts in confusion.items():
+            tp, fp, fn = counts["true_pos"], counts["false_pos"], counts["false_neg"]
+            metrics[ft] = {
+                **counts,
+                "precision": tp / (tp + fp) if tp + fp else None,
+                "precision_ci": wilson_interval(tp, tp + fp),
+                "recall": tp / (tp + fn) if tp + fn else None,
+                "recall_ci": wilson_interval(tp, tp + fn),
+            }
+        stage_stats = {
+            stage: {
+                "mean_ms": 1e3 * float(np.mean(values)) if values else 0.0,
+                "p95_ms": 1e3 * float(np.percentile(values, 95)) if values else 0.0,
+            }
+            for stage, values in timings.items()
+        }
+        return {"trials": trials, "failure_types": metrics, "stages": stage_stats}
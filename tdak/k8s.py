@@ -0,0 +1,417 @@
+# tdak/k8s.py
+"""Watch-based Kubernetes ingestion
+
+Lists nodes, pods and endpoints once, then follows their watch streams and
+applies each delta to a ``ClusterState`` that owns the live ``Node`` and
+``ServiceDependency`` objects. Node metrics (metrics.k8s.io has no watch)
+are polled on an interval over the same pooled keep-alive connections.
+"""
+import asyncio
+import json
+import ssl
+from datetime import datetime
+from urllib.parse import urlsplit
+from tdak.network import Node, ServiceDependency
+
+ZONE_LABELS = ("topology.kubernetes.io/zone", "failure-domain.beta.kubernetes.io/zone")
+CRITICAL_SERVICE_LABEL = "tdak.io/critical-service"
+LATENCY_ANNOTATION = "tdak.io/latency-ms"
+# Same defaults ClusterGenerator uses for intra- and cross-zone hops
+SAME_ZONE_LATENCY_MS = 10.0
+CROSS_ZONE_LATENCY_MS = 150.0
+
+_SUFFIXES = {
+    "n": 1e-9, "u": 1e-6, "m": 1e-3, "": 1.0,
+    "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12, "P": 1e15, "E": 1e18,
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40, "Pi": 2**50, "Ei": 2**60,
+}
+
+
+class KubeAPIError(Exception):
+    def __init__(self, status, reason, body=b""):
+        super().__init__(f"HTTP {status} {reason}")
+        self.status = status
+        self.body = body
+
+
+def parse_quantity(value):
+    """Kubernetes resource quantity ("250m", "4Gi", "1.5") as a float"""
+    value = str(value).strip()
+    for suffix in sorted(_SUFFIXES, key=len, reverse=True):
+        if suffix and value.endswith(suffix):
+            return float(value[:-len(suffix)]) * _SUFFIXES[suffix]
+    return float(value)
+
+
+class KubeClient:
+    """Minimal asyncio HTTP/1.1 client for the Kubernetes API
+
+    Request/response calls share a bounded pool of keep-alive connections;
+    each watch holds a dedicated connection for its stream.
+    """
+
+    def __init__(self, base_url, token=None, ssl_context=None, pool_size=4):
+        url = urlsplit(base_url)
+        self.host = url.hostname
+        self.port = url.port or (443 if url.scheme == "https" else 80)
+        self.ssl = (ssl_context or ssl.create_default_context()) if url.scheme == "https" else None
+        self.token = token
+        self.pool_size = pool_size
+        self._idle = []
+        self._slots = None  # created on first use, inside the running loop
+        self.connections_opened = 0
+
+    async def _connect(self):
+        self.connections_opened += 1
+        return await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+
+    def _request(self, path):
+        headers = [f"GET {path} HTTP/1.1", f"Host: {self.host}:{self.port}",
+                   "Accept: application/json", "Connection: keep-alive"]
+        if self.token:
+            headers.append(f"Authorization: Bearer {self.token}")
+        return ("\r\n".join(headers) + "\r\n\r\n").encode()
+
+    async def get_json(self, path):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        async with self._slots:
+            reused = bool(self._idle)
+            conn = self._idle.pop() if reused else await self._connect()
+            try:
+                status, reason, headers, body = await self._exchange(conn, path)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                conn[1].close()
+                if not reused:
+                    raise
+                # The server dropped an idle keep-alive connection; retry once fresh
+                conn = await self._connect()
+                status, reason, headers, body = await self._exchange(conn, path)
+            if headers.get("connection", "").lower() == "close":
+                conn[1].close()
+            else:
+                self._idle.append(conn)
+        if status >= 400:
+            raise KubeAPIError(status, reason, body)
+        return json.loads(body)
+
+    async def _exchange(self, conn, path):
+        reader, writer = conn
+        writer.write(self._request(path))
+        await writer.drain()
+        status, reason, headers = await _read_head(reader)
+        return status, reason, headers, await _read_body(reader, headers)
+
+    async def watch(self, path, resource_version):
+        """Yield watch events (dicts with ``type`` and ``object``) until the
+        server closes the stream"""
+        sep = "&" if "?" in path else "?"
+        reader, writer = await self._connect()
+        try:
+            writer.write(self._request(
+                f"{path}{sep}watch=1&allowWatchBookmarks=true&resourceVersion={resource_version}"))
+            await writer.drain()
+            status, reason, headers = await _read_head(reader)
+            if status >= 400:
+                raise KubeAPIError(status, reason, await _read_body(reader, headers))
+            buffer = b""
+            async for chunk in _iter_body(reader, headers):
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    if line.strip():
+                        yield json.loads(line)
+        finally:
+            writer.close()
+
+    async def close(self):
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+async def _read_head(reader):
+    status_line = (await reader.readuntil(b"\r\n")).decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readuntil(b"\r\n")
+        if line == b"\r\n":
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    reason = status_line[2].strip() if len(status_line) > 2 else ""
+    return int(status_line[1]), reason, headers
+
+
+async def _iter_body(reader, headers):
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                return
+            chunk = await reader.readexactly(size)
+            await reader.readexactly(2)
+            yield chunk
+    elif "content-length" in headers:
+        yield await reader.readexactly(int(headers["content-length"]))
+    else:
+        while chunk := await reader.read(65536):
+            yield chunk
+
+
+async def _read_body(reader, headers):
+    return b"".join([chunk async for chunk in _iter_body(reader, headers)])
+
+
+class ClusterState:
+    """Live cluster model updated in place from API objects
+
+    ``nodes`` maps node name to its ``Node``; fields are mutated on every
+    event so holders of those objects always see the latest values.
+    Dependencies are derived per Endpoints object: the ready backends of a
+    service are linked in a ring, with latency from the
+    ``tdak.io/latency-ms`` annotation or the same/cross-zone defaults.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self._pods = {}          # (namespace, name) -> (node, running, services)
+        self._pods_by_node = {}  # node -> {(namespace, name)}
+        self._endpoints = {}     # (namespace, name) -> ServiceDependency list
+        self._metrics = {}       # node -> (cpu cores, memory bytes)
+        self._allocatable = {}   # node -> (cpu cores, memory bytes)
+
+    @property
+    def service_deps(self):
+        return [sd for deps in self._endpoints.values() for sd in deps]
+
+    def snapshot(self):
+        """Current ``(nodes, service_deps)`` lists for the analyzers"""
+        return list(self.nodes.values()), self.service_deps
+
+    def keys(self, kind):
+        """``(namespace, name)`` of every stored object of ``kind``"""
+        if kind == "nodes":
+            return {("", name) for name in self.nodes}
+        return set({"pods": self._pods, "endpoints": self._endpoints}[kind])
+
+    def apply(self, kind, event_type, obj):
+        handler = {"nodes": self.apply_node, "pods": self.apply_pod,
+                   "endpoints": self.apply_endpoints}[kind]
+        handler(event_type, obj)
+
+    def apply_node(self, event_type, obj):
+        name = obj["metadata"]["name"]
+        if event_type == "DELETED":
+            self.nodes.pop(name, None)
+            self._allocatable.pop(name, None)
+            self._metrics.pop(name, None)
+            return
+        labels = obj["metadata"].get("labels") or {}
+        status = obj.get("status") or {}
+        allocatable = status.get("allocatable") or {}
+        self._allocatable[name] = (parse_quantity(allocatable.get("cpu", 0)),
+                                   parse_quantity(allocatable.get("memory", 0)))
+        conditions = {c["type"]: c for c in status.get("conditions") or []}
+
+        node = self.nodes.get(name)
+        if node is None:
+            node = self.nodes[name] = Node(
+                name=name, zone="", cpu_load=0.0, memory_usage=0.0, running_pods=0,
+                storage_usage=0.0, critical_services=[], last_heartbeat=datetime.now())
+            self._refresh_pods(name)
+        node.zone = next((labels[k] for k in ZONE_LABELS if k in labels), "unknown")
+        node.storage_usage = 1.0 if _condition(conditions, "DiskPressure") else 0.0
+        node.dns_healthy = not _condition(conditions, "NetworkUnavailable")
+        heartbeat = conditions.get("Ready", {}).get("lastHeartbeatTime")
+        if heartbeat:
+            node.last_heartbeat = _parse_time(heartbeat)
+        self._refresh_load(name)
+
+    def apply_pod(self, event_type, obj):
+        key = _object_key(obj)
+        old = self._pods.pop(key, None)
+        if old is not None:
+            self._pods_by_node.get(old[0], set()).discard(key)
+        new = None
+        if event_type != "DELETED":
+            labels = obj["metadata"].get("labels") or {}
+            services = labels.get(CRITICAL_SERVICE_LABEL, "")
+            new = self._pods[key] = (
+                (obj.get("spec") or {}).get("nodeName"),
+                (obj.get("status") or {}).get("phase") == "Running",
+                tuple(s for s in services.split(",") if s),
+            )
+            self._pods_by_node.setdefault(new[0], set()).add(key)
+        # Only the node(s) the pod left or landed on change
+        for node in {old and old[0], new and new[0]} - {None}:
+            self._refresh_pods(node)
+
+    def apply_endpoints(self, event_type, obj):
+        key = _object_key(obj)
+        if event_type == "DELETED":
+            self._endpoints.pop(key, None)
+            return
+        backends = sorted({
+            addr["nodeName"]
+            for subset in obj.get("subsets") or []
+            for addr in subset.get("addresses") or []
+            if addr.get("nodeName")
+        })
+        annotation = (obj["metadata"].get("annotations") or {}).get(LATENCY_ANNOTATION)
+        deps = []
+        if len(backends) > 1:
+            ring = list(zip(backends, backends[1:] + backends[:1]))
+            for src, tgt in ring[:1] if len(backends) == 2 else ring:
+                deps.append(ServiceDependency(src, tgt, self._latency(src, tgt, annotation)))
+        self._endpoints[key] = deps
+
+    def apply_node_metrics(self, items):
+        """Apply a metrics.k8s.io NodeMetricsList ``items`` payload"""
+        for item in items:
+            name = item["metadata"]["name"]
+            usage = item.get("usage") or {}
+            self._metrics[name] = (parse_quantity(usage.get("cpu", 0)),
+                                   parse_quantity(usage.get("memory", 0)))
+            self._refresh_load(name)
+
+    def _latency(self, src, tgt, annotation):
+        if annotation is not None:
+            return float(annotation)
+        zone = lambda n: self.nodes[n].zone if n in self.nodes else None
+        same = zone(src) is not None and zone(src) == zone(tgt)
+        return SAME_ZONE_LATENCY_MS if same else CROSS_ZONE_LATENCY_MS
+
+    def _refresh_load(self, name):
+        node = self.nodes.get(name)
+        if node is None or name not in self._metrics:
+            return
+        (cpu, mem), (cpu_cap, mem_cap) = self._metrics[name], self._allocatable.get(name, (0, 0))
+        node.cpu_load = min(cpu / cpu_cap, 1.0) if cpu_cap else 0.0
+        node.memory_usage = min(mem / mem_cap, 1.0) if mem_cap else 0.0
+
+    def _refresh_pods(self, name):
+        node = self.nodes.get(name)
+        if node is None:
+            return
+        pods = [self._pods[key] for key in self._pods_by_node.get(name, ())]
+        node.running_pods = sum(1 for p in pods if p[1])
+        node.critical_services = sorted({s for p in pods if p[1] for s in p[2]})
+
+
+def _object_key(obj):
+    return obj["metadata"].get("namespace", ""), obj["metadata"]["name"]
+
+
+def _condition(conditions, kind):
+    return conditions.get(kind, {}).get("status") == "True"
+
+
+def _parse_time(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
+
+
+class Ingestor:
+    """Keeps a ``ClusterState`` in sync with the API server
+
+    ``start()`` lists every resource once, then runs one watch task per
+    resource and a metrics poller. Watches resume from the last seen
+    resourceVersion after a disconnect and fall back to a fresh list only
+    when the server reports it expired (HTTP 410 Gone).
+    """
+
+    RESOURCES = {
+        "nodes": "/api/v1/nodes",
+        "pods": "/api/v1/pods",
+        "endpoints": "/api/v1/endpoints",
+    }
+    METRICS_PATH = "/apis/metrics.k8s.io/v1beta1/nodes"
+
+    def __init__(self, client, state=None, metrics_interval=15.0, retry_delay=1.0):
+        self.client = client
+        self.state = state or ClusterState()
+        self.metrics_interval = metrics_interval
+        self.retry_delay = retry_delay
+        self.resource_versions = {}
+        self._tasks = []
+
+    async def start(self):
+        for kind in self.RESOURCES:
+            await self._list(kind)
+        await self._poll_metrics_once()
+        self._tasks = [asyncio.create_task(self._watch_loop(kind)) for kind in self.RESOURCES]
+        if self.metrics_interval:
+            self._tasks.append(asyncio.create_task(self._metrics_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.client.close()
+
+    async def _list(self, kind):
+        payload = await self.client.get_json(self.RESOURCES[kind])
+        # A relist after 410 Gone must also drop whatever was deleted while
+        # no watch was running
+        gone = self.state.keys(kind) - {_object_key(o) for o in payload["items"]}
+        for namespace, name in gone:
+            self.state.apply(kind, "DELETED", {"metadata": {"namespace": namespace, "name": name}})
+        for obj in payload["items"]:
+            self.state.apply(kind, "ADDED", obj)
+        self.resource_versions[kind] = payload["metadata"]["resourceVersion"]
+
+    async def _watch_loop(self, kind):
+        while True:
+            try:
+                async for event in self.client.watch(self.RESOURCES[kind],
+                                                     self.resource_versions[kind]):
+                    self._handle(kind, event)
+            except KubeAPIError as exc:
+                if exc.status != 410:
+                    await asyncio.sleep(self.retry_delay)
+                    continue
+                await self._relist(kind)
+            except _Expired:
+                await self._relist(kind)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                await asyncio.sleep(self.retry_delay)
+
+    async def _relist(self, kind):
+        while True:
+            try:
+                return await self._list(kind)
+            except (KubeAPIError, ConnectionError, asyncio.IncompleteReadError, OSError):
+                await asyncio.sleep(self.retry_delay)
+
+    def _handle(self, kind, event):
+        event_type, obj = event.get("type"), event.get("object") or {}
+        if event_type == "ERROR":
+            if obj.get("code") == 410:
+                raise _Expired()
+            return
+        version = (obj.get("metadata") or {}).get("resourceVersion")
+        if event_type != "BOOKMARK":
+            self.state.apply(kind, event_type, obj)
+        if version:
+            self.resource_versions[kind] = version
+
+    async def _poll_metrics_once(self):
+        try:
+            payload = await self.client.get_json(self.METRICS_PATH)
+        except KubeAPIError:
+            return  # metrics-server not installed
+        self.state.apply_node_metrics(payload.get("items") or [])
+
+    async def _metrics_loop(self):
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            try:
+                await self._poll_metrics_once()
+            except (ConnectionError, asyncio.IncompleteReadError, OSError):
+                pass
+
+
+class _Expired(Exception):
+    """Watch reported its resourceVersion is too old to resume from"""
@@ -0,0 +1,170 @@
+# tdak/metrics.py
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; spans a sub-millisecond MST up to a multi-minute maxdim-2 ripser run
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000,
+                10000, 100000, 1000000)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """In-process store of pipeline metrics
+
+    Stage latencies, diagram sizes and filtration sizes are histograms,
+    cache hits and misses are counters. Every observation is also forwarded
+    to the optional ``sinks`` (objects with an ``emit(kind, name, value,
+    labels)`` method), so metrics can be shipped elsewhere as they happen.
+    ``render()`` produces the Prometheus text exposition format.
+    """
+
+    def __init__(self, prefix="tdak", sinks=()):
+        self.prefix = prefix
+        self.sinks = list(sinks)
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram(buckets)
+            hist.observe(value)
+        self._emit("histogram", name, value, labels)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._emit("counter", name, value, labels)
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+        self._emit("gauge", name, value, labels)
+
+    @contextmanager
+    def timer(self, stage, **labels):
+        """Record the wall time of the block as ``stage_seconds{stage=...}``"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("stage_seconds", time.perf_counter() - start, stage=stage, **labels)
+
+    def _emit(self, kind, name, value, labels):
+        for sink in self.sinks:
+            sink.emit(kind, f"{self.prefix}_{name}", value, labels)
+
+    def render(self):
+        """Prometheus text format of everything recorded so far"""
+        lines = []
+        with self._lock:
+            for kind, store in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted({n for n, _ in store}):
+                    full = f"{self.prefix}_{name}" + ("_total" if kind == "counter" else "")
+                    lines.append(f"# TYPE {full} {kind}")
+                    for (n, labels), value in sorted(store.items()):
+                        if n == name:
+                            lines.append(f"{full}{_format_labels(labels)} {value}")
+            for name in sorted({n for n, _ in self._histograms}):
+                full = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {full} histogram")
+                for (n, labels), hist in sorted(self._histograms.items(), key=lambda kv: kv[0]):
+                    if n != name:
+                        continue
+                    running = 0
+                    for bound, count in zip(hist.buckets + ("+Inf",), hist.counts):
+                        running += count
+                        le = labels + (("le", str(bound)),)
+                        lines.append(f"{full}_bucket{_format_labels(le)} {running}")
+                    lines.append(f"{full}_sum{_format_labels(labels)} {hist.sum}")
+                    lines.append(f"{full}_count{_format_labels(labels)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+
+class NullMetrics:
+    """Default no-op registry so uninstrumented runs pay nothing"""
+
+    def observe(self, name, value, buckets=None, **labels):
+        pass
+
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def set(self, name, value, **labels):
+        pass
+
+    def timer(self, stage, **labels):
+        return nullcontext()
+
+
+NULL_METRICS = NullMetrics()
+
+
+class StreamSink:
+    """Sink writing one ``kind name{labels} value`` line per observation"""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def emit(self, kind, name, value, labels):
+        self.stream.write(f"{kind} {name}{_format_labels(_label_key(labels))} {value}\n")
+
+
+def serve_metrics(registry, port=9464, host="127.0.0.1"):
+    """Serve ``registry.render()`` on http://host:port/metrics from a daemon thread
+
+    Returns the server; call ``shutdown()`` to stop it.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
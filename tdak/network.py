@@ -2,7 +2,6 @@ import numpy as np
 from dataclasses import dataclass, replace
 from datetime import datetime
 from typing import List
-import random
 
 @dataclass
 class Node:
@@ -27,18 +26,371 @@ class ServiceDependency:
         if self.latency_ms < 0:
             raise ValueError("Latency cannot be negative")
 
+FLAG_DNS_HEALTHY = 0x1
+
+
+class NodeTable:
+    """Struct-of-arrays cluster state, one NumPy column per node field
+
+    Metrics live in a single Fortran-ordered float32 ``(n, 4)`` block so each
+    metric column is contiguous and the block doubles as the raw feature
+    matrix. float32 halves the memory of the block but keeps only about 7
+    significant digits: a load of 0.3 reads back as 0.30000001192..., so
+    rows round-trip through ``from_nodes`` / ``to_nodes`` to within ~1e-7
+    relative, and exactly only for dyadic values. Pod counts are exact up
+    to 2**24.
+    Zones are stored as categorical codes, ``dns_healthy`` as a bit in
+    ``flags`` and critical services as a bitmask over ``services``.
+    Indexing with an int returns a ``NodeView`` that reads and writes
+    through to the columns and quacks like ``Node``.
+    """
+
+    METRICS = ('cpu_load', 'memory_usage', 'running_pods', 'storage_usage')
+
+    def __init__(self, names, zone_codes, zones, metrics, heartbeats,
+                 flags=None, service_mask=None, services=()):
+        self.names = np.asarray(names, dtype='S')
+        self.zone_codes = np.asarray(zone_codes, dtype=np.int32)
+        self.zones = list(zones)
+        self.metrics = np.asfortranarray(metrics, dtype=np.float32).reshape(-1, 4)
+        self.heartbeats = np.asarray(heartbeats, dtype='datetime64[us]')
+        n = len(self.names)
+        self.flags = (np.full(n, FLAG_DNS_HEALTHY, dtype=np.uint8) if flags is None
+                      else np.asarray(flags, dtype=np.uint8))
+        self.service_mask = (np.zeros(n, dtype=np.uint32) if service_mask is None
+                             else np.asarray(service_mask, dtype=np.uint32))
+        self.services = list(services)
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """Build a table from an iterable of ``Node`` objects"""
+        nodes = list(nodes)
+        zones, services = {}, {}
+        zone_codes = [zones.setdefault(n.zone, len(zones)) for n in nodes]
+        service_mask = []
+        for n in nodes:
+            mask = 0
+            for svc in n.critical_services:
+                mask |= 1 << services.setdefault(svc, len(services))
+            service_mask.append(mask)
+        if len(services) > 32:
+            raise ValueError("NodeTable supports at most 32 distinct critical services")
+
+        return cls(
+            names=[n.name.encode('ascii') for n in nodes],
+            zone_codes=zone_codes,
+            zones=zones,
+            metrics=[[n.cpu_load, n.memory_usage, n.running_pods, n.storage_usage]
+                     for n in nodes],
+            heartbeats=[n.last_heartbeat for n in nodes],
+            flags=[FLAG_DNS_HEALTHY if n.dns_healthy else 0 for n in nodes],
+            service_mask=service_mask,
+            services=services,
+        )
+
+    def to_nodes(self):
+        return [self[i].to_node() for i in range(len(self))]
+
+    def copy(self):
+        return NodeTable(
+            self.names.copy(), self.zone_codes.copy(), self.zones,
+            self.metrics.copy(order='F'), self.heartbeats.copy(),
+            self.flags.copy(), self.service_mask.copy(), self.services,
+        )
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        return (NodeView(self, i) for i in range(len(self)))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            if not -len(self) <= key < len(self):
+                raise IndexError("node index out of range")
+            return NodeView(self, int(key) % len(self))
+        # Slices, masks and index arrays select a sub-table
+        return NodeTable(
+            self.names[key], self.zone_codes[key], self.zones,
+            self.metrics[key], self.heartbeats[key],
+            self.flags[key], self.service_mask[key], self.services,
+        )
+
+    @property
+    def cpu_load(self):
+        return self.metrics[:, 0]
+
+    @property
+    def memory_usage(self):
+        return self.metrics[:, 1]
+
+    @property
+    def running_pods(self):
+        return self.metrics[:, 2]
+
+    @property
+    def storage_usage(self):
+        return self.metrics[:, 3]
+
+    @property
+    def dns_healthy(self):
+        return (self.flags & FLAG_DNS_HEALTHY).astype(bool)
+
+    def has_service(self, service):
+        """Boolean column: which nodes run ``service`` as critical"""
+        if service not in self.services:
+            return np.zeros(len(self), dtype=bool)
+        return (self.service_mask >> np.uint32(self.services.index(service))) & 1 == 1
+
+    def in_zone(self, zone):
+        if zone not in self.zones:
+            return np.zeros(len(self), dtype=bool)
+        return self.zone_codes == self.zones.index(zone)
+
+    def feature_matrix(self):
+        """The (n, 4) persistence input, with pods scaled by 1/10
+
+        Pods are rounded to whole counts first, as ``NodeView.running_pods``
+        reads them, so tables and node lists give the same point cloud
+        even after the metric block was written to directly.
+        """
+        X = self.metrics * _FEATURE_SCALE
+        X[:, 2] = np.rint(self.metrics[:, 2]).astype(float) / 10.0
+        return X
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.names, self.zone_codes, self.metrics,
+                                      self.heartbeats, self.flags, self.service_mask))
+
+
+_FEATURE_SCALE = np.array([1.0, 1.0, 0.1, 1.0])
+
+
+class NodeView:
+    """Row view into a ``NodeTable`` exposing the ``Node`` attributes
+
+    A view is not a ``Node`` dataclass, so ``dataclasses.replace`` and
+    ``asdict`` reject it; call ``to_node()`` first for a detached copy.
+    """
+
+    __slots__ = ('_table', '_row')
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+
+    def _metric(self, col):
+        return float(self._table.metrics[self._row, col])
+
+    def _set_metric(self, col, value):
+        self._table.metrics[self._row, col] = value
+
+    def _set_pods(self, count):
+        if count != int(count):
+            raise ValueError(f"running_pods must be a whole number, got {count}")
+        self._set_metric(2, count)
+
+    name = property(lambda self: self._table.names[self._row].decode('ascii'))
+    zone = property(lambda self: self._table.zones[self._table.zone_codes[self._row]])
+    cpu_load = property(lambda self: self._metric(0), lambda self, v: self._set_metric(0, v))
+    memory_usage = property(lambda self: self._metric(1), lambda self, v: self._set_metric(1, v))
+    running_pods = property(lambda self: int(np.rint(self._table.metrics[self._row, 2])),
+                            lambda self, v: self._set_pods(v))
+    storage_usage = property(lambda self: self._metric(3), lambda self, v: self._set_metric(3, v))
+
+    @property
+    def critical_services(self):
+        mask = int(self._table.service_mask[self._row])
+        return [svc for bit, svc in enumerate(self._table.services) if mask >> bit & 1]
+
+    @property
+    def last_heartbeat(self):
+        return self._table.heartbeats[self._row].astype(datetime)
+
+    @property
+    def dns_healthy(self):
+        return bool(self._table.flags[self._row] & FLAG_DNS_HEALTHY)
+
+    @dns_healthy.setter
+    def dns_healthy(self, healthy):
+        if healthy:
+            self._table.flags[self._row] |= FLAG_DNS_HEALTHY
+        else:
+            self._table.flags[self._row] &= ~np.uint8(FLAG_DNS_HEALTHY)
+
+    def to_node(self):
+        return Node(
+            name=self.name,
+            zone=self.zone,
+            cpu_load=self.cpu_load,
+            memory_usage=self.memory_usage,
+            running_pods=self.running_pods,
+            storage_usage=self.storage_usage,
+            critical_services=self.critical_services,
+            last_heartbeat=self.last_heartbeat,
+            dns_healthy=self.dns_healthy,
+        )
+
+    def __repr__(self):
+        return f"NodeView({self.to_node()!r})"
+
+
+class DependencyTable:
+    """Struct-of-arrays counterpart of a list of ``ServiceDependency``
+
+    Endpoints are categorical: ``sources`` and ``targets`` are codes into
+    the ``endpoints`` name vocabulary, so the table stays valid when node
+    rows are dropped. Iterating yields ``ServiceDependency`` copies.
+    """
+
+    def __init__(self, sources, targets, latency_ms, active=None, endpoints=None):
+        if endpoints is None:
+            # Raw names: factorize into a vocabulary
+            count = len(sources)
+            endpoints, codes = np.unique(
+                np.concatenate([np.asarray(sources, dtype='S'),
+                                np.asarray(targets, dtype='S')]),
+                return_inverse=True)
+            sources, targets = codes[:count], codes[count:]
+        self.endpoints = np.asarray(endpoints, dtype='S')
+        self.sources = np.asarray(sources, dtype=np.int32)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.latency_ms = np.asarray(latency_ms, dtype=np.float64)
+        self.active = (np.ones(len(self.sources), dtype=bool) if active is None
+                       else np.asarray(active, dtype=bool))
+        if (self.latency_ms < 0).any():
+            raise ValueError("Latency cannot be negative")
+
+    @classmethod
+    def from_dependencies(cls, deps):
+        deps = list(deps)
+        return cls(
+            [sd.source.encode('ascii') for sd in deps],
+            [sd.target.encode('ascii') for sd in deps],
+            [sd.latency_ms for sd in deps],
+            [sd.active for sd in deps],
+        )
+
+    def to_dependencies(self):
+        return list(self)
+
+    def copy(self):
+        return DependencyTable(self.sources.copy(), self.targets.copy(),
+                               self.latency_ms.copy(), self.active.copy(),
+                               self.endpoints)
+
+    def touching(self, names):
+        """Boolean column: dependencies with an endpoint among ``names``"""
+        names = set(np.asarray(names, dtype='S').tolist())
+        hit = np.fromiter((n in names for n in self.endpoints.tolist()),
+                          dtype=bool, count=len(self.endpoints))
+        return hit[self.sources] | hit[self.targets]
+
+    def __len__(self):
+        return len(self.sources)
+
+    def __iter__(self):
+        return (self[k] for k in range(len(self)))
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return ServiceDependency(self.endpoints[self.sources[key]].decode('ascii'),
+                                     self.endpoints[self.targets[key]].decode('ascii'),
+                                     float(self.latency_ms[key]), bool(self.active[key]))
+        return DependencyTable(self.sources[key], self.targets[key],
+                               self.latency_ms[key], self.active[key], self.endpoints)
+
+
+# Vectorized failure catalogue: name -> fn(rng, nodes, deps) -> (nodes, deps).
+# Functions receive private copies of the tables and may modify them in place.
+FAILURE_TYPES = {}
+
+
+def register_failure(name):
+    """Decorator adding a vectorized failure to ``FAILURE_TYPES``"""
+    def decorator(fn):
+        FAILURE_TYPES[name] = fn
+        return fn
+    return decorator
+
+
+@register_failure("zone_outage")
+def _vectorized_zone_outage(rng, nodes, deps):
+    if not nodes.zones:
+        return nodes, deps
+    dead_zone = rng.integers(len(nodes.zones))
+    dead = nodes.zone_codes == dead_zone
+    return nodes[~dead], deps[~deps.touching(nodes.names[dead])]
+
+
+@register_failure("storage_failure")
+def _vectorized_storage_failure(rng, nodes, deps):
+    nodes.storage_usage[rng.random(len(nodes)) < 0.25] = 1.0
+    return nodes, deps
+
+
+@register_failure("network_congestion")
+def _vectorized_network_congestion(rng, nodes, deps):
+    deps.latency_ms[rng.random(len(deps)) < 0.3] *= 10
+    return nodes, deps
+
+
+@register_failure("dns_failure")
+def _vectorized_dns_failure(rng, nodes, deps):
+    # Disable 50% of dependencies, mark 30% nodes with DNS issues
+    deps.active[rng.choice(len(deps), size=int(len(deps) * 0.5), replace=False)] = False
+    nodes.flags[rng.random(len(nodes)) < 0.3] &= ~np.uint8(FLAG_DNS_HEALTHY)
+    return nodes, deps
+
+
+@register_failure("pod_overload")
+def _vectorized_pod_overload(rng, nodes, deps):
+    np.minimum(nodes.cpu_load * 1.8, 1.0, out=nodes.cpu_load)
+    np.minimum(nodes.memory_usage * 1.5, 1.0, out=nodes.memory_usage)
+    nodes.running_pods[:] += 5
+    return nodes, deps
+
+
+class FailureInjector:
+    """Applies registered failures to whole tables with boolean masks
+
+    All randomness comes from one ``np.random.Generator``, so a seed fully
+    determines a scenario. Inputs are never modified.
+    """
+
+    def __init__(self, seed=None):
+        # Accepts a seed or an existing Generator to share its stream
+        self.rng = np.random.default_rng(seed)
+
+    def inject(self, nodes, deps, failure_type):
+        """Return ``(nodes, deps)`` after ``failure_type``; unknown types are a no-op"""
+        failure = FAILURE_TYPES.get(failure_type)
+        if failure is None:
+            return nodes, deps
+        return failure(self.rng, nodes.copy(), deps.copy())
+
+
 class ClusterGenerator:
-    def __init__(self, num_zones=3):
+    def __init__(self, num_zones=3, seed=None):
         self.zones = [f"zone-{i}" for i in range(num_zones)]
         self.node_counter = 0
         self.service_deps = []
+        # One generator drives both cluster creation and failure injection
+        self.rng = np.random.default_rng(seed)
+        self.injector = FailureInjector(self.rng)
         
-    def generate_cluster(self):
+    def generate_cluster(self, as_table=False):
+        """Generate nodes; with ``as_table`` return a NodeTable and keep
+        ``service_deps`` as a DependencyTable for vectorized injection"""
         nodes = []
         for zone in self.zones:
-            for _ in range(np.random.randint(2, 5)):
+            for _ in range(self.rng.integers(2, 5)):
                 nodes.append(self._create_node(zone))
         self._create_dependencies(nodes)
+        if as_table:
+            self.service_deps = DependencyTable.from_dependencies(self.service_deps)
+            return NodeTable.from_nodes(nodes)
         return nodes
     
     def _create_node(self, zone):
@@ -46,11 +398,11 @@ class ClusterGenerator:
         return Node(
             name=f"{zone}-node-{self.node_counter}",
             zone=zone,
-            cpu_load=np.clip(np.random.beta(2, 5), 0, 1),
-            memory_usage=np.clip(np.random.beta(2, 5), 0, 1),
-            running_pods=np.random.poisson(3),
-            storage_usage=np.clip(np.random.beta(1, 3), 0, 1),
-            critical_services=["ingress"] if np.random.rand() < 0.2 else [],
+            cpu_load=np.clip(self.rng.beta(2, 5), 0, 1),
+            memory_usage=np.clip(self.rng.beta(2, 5), 0, 1),
+            running_pods=int(self.rng.poisson(3)),
+            storage_usage=np.clip(self.rng.beta(1, 3), 0, 1),
+            critical_services=["ingress"] if self.rng.random() < 0.2 else [],
             last_heartbeat=datetime.now()
         )
 
@@ -60,13 +412,20 @@ class ClusterGenerator:
         for src in svc_nodes:
             tgt_candidates = [n for n in svc_nodes if n != src]
             if len(tgt_candidates) >= 2:
-                for tgt in random.sample(tgt_candidates, 2):
+                for k in self.rng.choice(len(tgt_candidates), 2, replace=False):
+                    tgt = tgt_candidates[k]
                     self.service_deps.append(ServiceDependency(
                         src.name, tgt.name,
                         latency_ms=10 if src.zone == tgt.zone else 150
                     ))
 
     def inject_failure(self, nodes, failure_type):
+        if isinstance(nodes, NodeTable):
+            deps = self.service_deps
+            if not isinstance(deps, DependencyTable):
+                deps = DependencyTable.from_dependencies(deps)
+            nodes, self.service_deps = self.injector.inject(nodes, deps, failure_type)
+            return nodes
         if failure_type == "zone_outage":
             return self._zone_outage(nodes)
         elif failure_type == "storage_failure":
@@ -80,7 +439,7 @@ class ClusterGenerator:
         return nodes
 
     def _zone_outage(self, nodes):
-        dead_zone = np.random.choice(self.zones)
+        dead_zone = self.zones[self.rng.integers(len(self.zones))]
         dead_nodes = {n.name for n in nodes if n.zone == dead_zone}
         self.service_deps = [
             sd for sd in self.service_deps
@@ -91,25 +450,25 @@ class ClusterGenerator:
     def _storage_failure(self, nodes):
         return [
             replace(n, storage_usage=1.0) 
-            if random.random() < 0.25 else n
+            if self.rng.random() < 0.25 else n
             for n in nodes
         ]
 
     def _network_congestion(self, nodes):
         for sd in self.service_deps:
-            if random.random() < 0.3:
+            if self.rng.random() < 0.3:
                 sd.latency_ms *= 10
         return nodes
 
     def _dns_failure(self, nodes):
         # Disable 50% of dependencies
-        for sd in random.sample(self.service_deps, k=int(len(self.service_deps)*0.5)):
-            sd.active = False
+        for k in self.rng.choice(len(self.service_deps), int(len(self.service_deps)*0.5), replace=False):
+            self.service_deps[k].active = False
         
         # Mark 30% nodes with DNS issues
         return [
             replace(n, dns_healthy=False)
-            if random.random() < 0.3 else n
+            if self.rng.random() < 0.3 else n
             for n in nodes
         ]
 
@@ -0,0 +1,206 @@
+# tdak/pipeline.py
+import asyncio
+import inspect
+import time
+from collections import deque, namedtuple
+from tdak.analysis import ClusterAnalyzer
+from tdak.metrics import NULL_METRICS
+from tdak.network import FAILURE_TYPES, DependencyTable, NodeTable
+from tdak.topology import TopologyAnalyzer
+
+# ``created`` is a time.perf_counter() reading taken when the snapshot was captured
+Snapshot = namedtuple('Snapshot', ['seq', 'created', 'nodes', 'service_deps'])
+Alert = namedtuple('Alert', ['seq', 'failure_type', 'latency', 'report'])
+
+_DONE = object()
+
+
+class LatestQueue:
+    """Bounded asyncio queue that evicts the oldest item instead of blocking
+
+    A slow consumer therefore always sees the freshest snapshots; ``dropped``
+    counts what was thrown away.
+    """
+
+    def __init__(self, maxsize=1):
+        self._queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def put_nowait(self, item):
+        """Enqueue ``item``; returns the evicted stale item, if any"""
+        stale = None
+        if self._queue.full():
+            stale = self._queue.get_nowait()
+            self.dropped += 1
+        self._queue.put_nowait(item)
+        return stale
+
+    async def get(self):
+        return await self._queue.get()
+
+    async def close(self):
+        # Waits for room rather than evicting, so the last snapshot is kept
+        await self._queue.put(_DONE)
+
+    def close_nowait(self):
+        """End the stream without waiting, evicting the oldest item if full"""
+        self.put_nowait(_DONE)
+
+    def qsize(self):
+        return self._queue.qsize()
+
+
+def process_snapshot(topology, analyzer, nodes, service_deps, previous, maxdim, failure_types):
+    """Persistence, analysis and signature checks for one snapshot
+
+    Runs inside the pipeline's executor. ``previous`` holds the
+    ``(metric, network)`` diagrams of the last processed snapshot, or None
+    for the first one. Returns ``(diagrams, report, detected)``.
+    """
+    diagrams = (topology.compute_metric_persistence(nodes, maxdim=maxdim),
+                topology.compute_network_persistence(service_deps, sparse=True, maxdim=maxdim))
+    if previous is None:
+        return diagrams, None, []
+    report = analyzer.analyze(previous[0], diagrams[0], previous[1], diagrams[1], None, nodes)
+    detected = [ft for ft in failure_types if analyzer.validate_signature(report, ft)]
+    return diagrams, report, detected
+
+
+class DetectionPipeline:
+    """Long-running snapshot -> persistence -> analysis -> alert loop
+
+    ``run()`` consumes an async iterable of snapshots (``Snapshot`` tuples
+    or plain ``(nodes, service_deps)`` pairs) into a ``LatestQueue``: when
+    persistence falls behind, stale snapshots are dropped rather than
+    queued. Each snapshot is compared against the previous processed one
+    in ``executor`` (default: the loop's thread pool; a process pool works
+    too, at the cost of pickling the analyzers on every call). Alerts are
+    passed to every sink, which may be a plain or an async callable.
+    End-to-end latency runs from snapshot capture to alert emission. If
+    the snapshot source raises, ``run()`` stops and re-raises it.
+
+    With a ``RollingBaseline`` each snapshot is compared against the
+    baseline's ``reference()`` (the last normal snapshot) instead, and the
+    report is also scored against the running distribution of normal
+    change (``report['baseline']``), on the event loop so the baseline
+    state never crosses a process boundary. Snapshots it flags raise an
+    ``'anomaly'`` alert and do not move the reference, so a failure that
+    persists keeps being compared with the cluster before it started.
+    """
+
+    def __init__(self, topology=None, analyzer=None, executor=None, maxdim=1,
+                 queue_size=1, failure_types=None, sinks=(), metrics=None, baseline=None):
+        self.metrics = metrics or NULL_METRICS
+        self.topology = topology or TopologyAnalyzer(metrics=metrics)
+        self.analyzer = analyzer or ClusterAnalyzer(metrics=metrics)
+        self.executor = executor
+        self.maxdim = maxdim
+        self.queue_size = queue_size
+        self.failure_types = list(failure_types or FAILURE_TYPES)
+        self.sinks = list(sinks)
+        self.baseline = baseline
+        self.latencies = deque(maxlen=1024)
+        self.processed = 0
+        self.dropped = 0
+        self.alerts = 0
+        self._previous = None
+
+    async def run(self, snapshots):
+        """Process ``snapshots`` until the iterable is exhausted; returns ``stats()``"""
+        queue = LatestQueue(self.queue_size)
+        producer = asyncio.create_task(self._produce(snapshots, queue))
+        try:
+            while True:
+                snapshot = await self._next(queue, producer)
+                if snapshot is _DONE:
+                    break
+                await self._process(snapshot)
+            await producer
+        finally:
+            producer.cancel()
+            self.dropped += queue.dropped
+        return self.stats()
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "alerts": self.alerts,
+            "latency_p50_s": latencies[len(latencies) // 2] if latencies else None,
+            "latency_max_s": latencies[-1] if latencies else None,
+        }
+
+    async def _produce(self, snapshots, queue):
+        seq = 0
+        try:
+            async for item in snapshots:
+                if not isinstance(item, Snapshot):
+                    item = Snapshot(seq, time.perf_counter(), *item)
+                seq = item.seq + 1
+                if queue.put_nowait(item) is not None:
+                    self.metrics.inc('snapshots_dropped')
+                self.metrics.set('queue_depth', queue.qsize())
+        except BaseException:
+            # The consumer may be gone (cancellation) or about to raise, so
+            # never wait for room here
+            queue.close_nowait()
+            raise
+        await queue.close()
+
+    @staticmethod
+    async def _next(queue, producer):
+        """The next queued item, or the producer's exception as soon as it fails"""
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.wait({producer, getter}, return_when=asyncio.FIRST_COMPLETED)
+        if producer.done() and not producer.cancelled() and producer.exception() is not None:
+            getter.cancel()
+            raise producer.exception()
+        return await getter
+
+    async def _process(self, snapshot):
+        if not len(snapshot.nodes):
+            return  # nothing observed yet, e.g. before the first list completes
+        loop = asyncio.get_running_loop()
+        previous = self._previous if self.baseline is None else self.baseline.reference()
+        diagrams, report, detected = await loop.run_in_executor(
+            self.executor, process_snapshot, self.topology, self.analyzer,
+            snapshot.nodes, snapshot.service_deps, previous, self.maxdim,
+            self.failure_types)
+        self._previous = diagrams
+        if self.baseline is not None:
+            if report is None:
+                self.baseline.seed(diagrams)
+            else:
+                report['baseline'] = self.baseline.observe(report, diagrams)
+                if report['baseline']['anomalous']:
+                    detected = [*detected, 'anomaly']
+        for failure_type in detected:
+            alert = Alert(snapshot.seq, failure_type,
+                          time.perf_counter() - snapshot.created, report)
+            self.alerts += 1
+            self.metrics.inc('alerts', failure_type=failure_type)
+            for sink in self.sinks:
+                result = sink(alert)
+                if inspect.isawaitable(result):
+                    await result
+        latency = time.perf_counter() - snapshot.created
+        self.latencies.append(latency)
+        self.processed += 1
+        self.metrics.inc('snapshots_processed')
+        self.metrics.observe('snapshot_latency_seconds', latency)
+
+
+async def poll_snapshots(state, interval=5.0):
+    """Yield a frozen ``Snapshot`` of a live ``ClusterState`` every ``interval`` seconds
+
+    The ingestor mutates ``Node`` objects in place, so each snapshot is
+    copied into tables before it leaves the event loop.
+    """
+    seq = 0
+    while True:
+        nodes, deps = state.snapshot()
+        yield Snapshot(seq, time.perf_counter(), NodeTable.from_nodes(nodes),
+                       DependencyTable.from_dependencies(deps))
+        seq += 1
+        await asyncio.sleep(interval)
@@ -0,0 +1,192 @@
+# tdak/scheduler.py
+import time
+from collections import Counter, deque, namedtuple
+from tdak.analysis import ClusterAnalyzer
+from tdak.distances import exceeds
+from tdak.metrics import NULL_METRICS
+from tdak.network import FAILURE_TYPES, DependencyTable
+from tdak.topology import TopologyAnalyzer
+
+TIERS = ('screen', 'full')
+
+# One scheduler tick. ``report`` and ``detected`` are only set on full ticks;
+# ``reasons`` says why the full tier ran ('seed', 'periodic' or screen trips).
+Tick = namedtuple('Tick', ['seq', 'tier', 'reasons', 'screen', 'report', 'detected', 'latency'])
+
+
+class TieredScheduler:
+    """Cheap screening on every tick, full analysis only when it matters
+
+    The screen tier costs a spanning tree per source: metric and network H0
+    (``maxdim=0`` never calls ripser), the active-dependency count and the
+    share of nodes flagged by the analyzer's ``OutlierDetector``, which
+    also absorbs every quiet tick into its model of normal nodes. It trips
+    when, against the last quiet tick,
+
+    - metric or network H0 moved by more than ``h0_threshold`` (Wasserstein,
+      settled by cheap bounds where possible),
+    - the active-dependency count changed by more than ``dependency_change``,
+    - the number of outlier nodes grew by more than ``outlier_fraction``
+      of the cluster.
+
+    A trip, the first tick, or every ``full_every``-th tick runs the full
+    tier: persistence up to ``maxdim``, ``ClusterAnalyzer.analyze`` against
+    the last quiet full diagrams, and signature matching.
+
+    References move on seeding, on quiet periodic runs, and once
+    ``rebaseline_after`` consecutive tripped full runs have all come back
+    clean: a persistent change that matches no failure signature (a
+    scaled-down deployment, say) becomes the new normal instead of
+    escalating every tick, while a detected failure never does.
+
+    Each tier has a latency budget in seconds and overruns are counted. A
+    full tier that overruns drops one homology dimension (never below H1)
+    for the rest of the run; stepping back up automatically would just
+    overrun again, so ``full_maxdim`` is only raised by hand.
+    """
+
+    def __init__(self, topology=None, analyzer=None, maxdim=2, full_every=60,
+                 screen_budget=0.05, full_budget=2.0, h0_threshold=0.5,
+                 dependency_change=0.2, outlier_fraction=0.05, failure_types=None,
+                 rebaseline_after=3, metrics=None):
+        self.metrics = metrics or NULL_METRICS
+        self.topology = topology or TopologyAnalyzer(metrics=metrics)
+        self.analyzer = analyzer or ClusterAnalyzer(metrics=metrics)
+        self.maxdim = maxdim
+        self.full_maxdim = maxdim
+        self.full_every = full_every
+        self.budgets = {'screen': screen_budget, 'full': full_budget}
+        self.h0_threshold = h0_threshold
+        self.dependency_change = dependency_change
+        self.outlier_fraction = outlier_fraction
+        self.failure_types = list(failure_types or FAILURE_TYPES)
+        self.rebaseline_after = rebaseline_after
+        self.ticks = 0
+        self.escalations = 0
+        self.reasons = Counter()
+        self.runs = Counter()
+        self.overruns = Counter()
+        self.latencies = {tier: deque(maxlen=1024) for tier in TIERS}
+        self._screen_reference = None
+        self._full_reference = None
+        self._since_full = 0
+        self._cleared = 0
+
+    def tick(self, nodes, service_deps):
+        """Screen one snapshot, escalating to full analysis when needed; returns a ``Tick``"""
+        seq = self.ticks
+        self.ticks += 1
+        started = time.perf_counter()
+        screen = self._screen(nodes, service_deps)
+        reasons = self._trips(screen)
+        self._record('screen', time.perf_counter() - started)
+
+        seeding = self._full_reference is None
+        if seeding:
+            reasons.append('seed')
+        elif not reasons and self._since_full + 1 >= self.full_every:
+            reasons.append('periodic')
+        if not reasons:
+            self._screen_reference = screen
+            self._since_full += 1
+            self.analyzer.outlier_detector.partial_fit(nodes)
+            return Tick(seq, 'screen', [], screen, None, [], time.perf_counter() - started)
+
+        full_started = time.perf_counter()
+        report, detected, diagrams = self._full(nodes, service_deps)
+        full_seconds = time.perf_counter() - full_started
+        self._record('full', full_seconds)
+        self._since_full = 0
+        if set(reasons) - {'seed', 'periodic'}:
+            self.escalations += 1
+        for reason in reasons:
+            self.reasons[reason] += 1
+            self.metrics.inc('full_tier_runs', reason=reason)
+        # Only undetected ticks move the references, so a slow failure
+        # cannot become the new normal
+        self._cleared = 0 if detected else self._cleared + 1
+        if (seeding or (not detected and reasons == ['periodic'])
+                or self._cleared >= self.rebaseline_after):
+            self._screen_reference = screen
+            self._full_reference = diagrams
+            self._cleared = 0
+        self._adapt(full_seconds)
+        return Tick(seq, 'full', reasons, screen, report, detected,
+                    time.perf_counter() - started)
+
+    def stats(self):
+        tiers = {}
+        for tier in TIERS:
+            latencies = sorted(self.latencies[tier])
+            tiers[tier] = {
+                "runs": self.runs[tier],
+                "budget_s": self.budgets[tier],
+                "overruns": self.overruns[tier],
+                "latency_p50_s": latencies[len(latencies) // 2] if latencies else None,
+                "latency_max_s": latencies[-1] if latencies else None,
+            }
+        return {
+            "ticks": self.ticks,
+            "escalations": self.escalations,
+            "escalation_rate": self.escalations / self.ticks if self.ticks else 0.0,
+            "reasons": dict(self.reasons),
+            "full_maxdim": self.full_maxdim,
+            "tiers": tiers,
+        }
+
+    def _screen(self, nodes, service_deps):
+        if isinstance(service_deps, DependencyTable):
+            active = int(service_deps.active.sum())
+        else:
+            active = sum(1 for sd in service_deps if sd.active)
+        detector = self.analyzer.outlier_detector
+        scores = detector.detect(nodes)["scores"]
+        return {
+            "metric": self.topology.compute_metric_persistence(nodes, maxdim=0),
+            "network": self.topology.compute_network_persistence(service_deps, sparse=True,
+                                                                 maxdim=0),
+            "active_dependencies": active,
+            "outliers": int((scores > detector.threshold).sum()),
+            "nodes": len(nodes),
+        }
+
+    def _trips(self, screen):
+        reasons = []
+        reference = self._screen_reference
+        if reference is None:
+            return reasons
+        if screen["outliers"] - reference["outliers"] > self.outlier_fraction * screen["nodes"]:
+            reasons.append('outliers')
+        for source in ('metric', 'network'):
+            if exceeds(reference[source], screen[source], 0, self.h0_threshold):
+                reasons.append(f'{source}_h0')
+        before = reference["active_dependencies"]
+        if abs(screen["active_dependencies"] - before) > self.dependency_change * max(before, 1):
+            reasons.append('dependencies')
+        return reasons
+
+    def _full(self, nodes, service_deps):
+        diagrams = (self.topology.compute_metric_persistence(nodes, maxdim=self.full_maxdim),
+                    self.topology.compute_network_persistence(service_deps, sparse=True,
+                                                              maxdim=self.full_maxdim))
+        if self._full_reference is None:
+            return None, [], diagrams
+        reference = self._full_reference
+        report = self.analyzer.analyze(reference[0], diagrams[0], reference[1], diagrams[1],
+                                       None, nodes)
+        detected = [ft for ft in self.failure_types if self.analyzer.validate_signature(report, ft)]
+        return report, detected, diagrams
+
+    def _record(self, tier, seconds):
+        self.runs[tier] += 1
+        self.latencies[tier].append(seconds)
+        self.metrics.observe('tier_latency_seconds', seconds, tier=tier)
+        if seconds > self.budgets[tier]:
+            self.overruns[tier] += 1
+            self.metrics.inc('tier_budget_overruns', tier=tier)
+
+    def _adapt(self, seconds):
+        """Trade homology depth for latency when the full tier misses its budget"""
+        if seconds > self.budgets['full'] and self.full_maxdim > 1:
+            self.full_maxdim -= 1
+            self._full_reference = None  # diagrams of different depth do not compare
@@ -0,0 +1,338 @@
+# tdak/store.py
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+from tdak.network import DependencyTable, NodeTable
+
+FORMAT_VERSION = 2  # 2: diagram points are float32
+KINDS = ('metric', 'network')
+
+INDEX_DTYPE = np.dtype([
+    ('timestamp', '<i8'),          # datetime64[us] ticks
+    ('node_start', '<i8'), ('node_count', '<i8'),
+    ('endpoint_start', '<i8'), ('endpoint_count', '<i8'),
+    ('edge_start', '<i8'), ('edge_count', '<i8'),
+])
+DIAGRAM_DTYPE = np.dtype([
+    ('snapshot', '<i8'), ('kind', 'u1'), ('dim', 'u1'),
+    ('start', '<i8'), ('count', '<i8'),
+])
+
+# Fixed-width columns; the name dtype is set per store from ``name_width``
+_NODE_COLUMNS = {
+    'zone_codes': np.dtype('<i4'),
+    'metrics': np.dtype('<f4'),       # per snapshot: 4 contiguous metric columns
+    'heartbeats': np.dtype('<i8'),
+    'flags': np.dtype('u1'),
+    'service_mask': np.dtype('<u4'),
+}
+_EDGE_COLUMNS = {
+    'sources': np.dtype('<i4'),
+    'targets': np.dtype('<i4'),
+    'latency_ms': np.dtype('<f8'),
+    'active': np.dtype('?'),
+}
+
+
+class SnapshotStore:
+    """Append-only columnar store of snapshots and their persistence diagrams
+
+    Every column lives in its own flat file under ``path`` and snapshots are
+    appended as contiguous runs, so readers map the files with
+    ``np.memmap`` and hand out ``NodeTable``/``DependencyTable`` objects
+    whose columns are views into the maps (read-only; ``copy()`` them to
+    mutate). The index record of a snapshot is written last and acts as
+    the commit point: reopening for append truncates anything written
+    after the last complete record. Timestamps must not decrease, which
+    keeps the index sorted for ``search``.
+
+    Diagrams are stored per ``(snapshot, kind)`` with ``kind`` in
+    ``KINDS`` and may be added after the snapshot itself; the latest write
+    wins.
+    """
+
+    def __init__(self, path, mode='r', name_width=64):
+        if mode not in ('r', 'a'):
+            raise ValueError("mode must be 'r' or 'a'")
+        self.path = path
+        self.mode = mode
+        meta_path = os.path.join(path, 'meta.json')
+        if mode == 'a' and not os.path.exists(meta_path):
+            os.makedirs(path, exist_ok=True)
+            with open(meta_path, 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'name_width': name_width}, f)
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported store version {meta['version']}")
+        self.name_dtype = np.dtype(f"S{meta['name_width']}")
+
+        self._files = {
+            'index': INDEX_DTYPE,
+            'diagrams': DIAGRAM_DTYPE,
+            'points': np.dtype('<f4'),  # as PersistenceDiagramSet holds them
+            'node_names': self.name_dtype,
+            'endpoints': self.name_dtype,
+            **{f'node_{k}': v for k, v in _NODE_COLUMNS.items()},
+            **{f'edge_{k}': v for k, v in _EDGE_COLUMNS.items()},
+        }
+        if mode == 'a':
+            self._recover()
+        self._maps = None
+        self._vocab = self._read_vocab()
+        self._diagram_lookup = None
+
+    def _file(self, name):
+        return os.path.join(self.path, name + '.bin')
+
+    def _count(self, name):
+        """Whole records currently in a column file"""
+        try:
+            return os.path.getsize(self._file(name)) // self._files[name].itemsize
+        except FileNotFoundError:
+            return 0
+
+    def _read_vocab(self):
+        try:
+            with open(os.path.join(self.path, 'vocab.jsonl')) as f:
+                return [json.loads(line) for line in f][:self._count('index')]
+        except FileNotFoundError:
+            return []
+
+    def _recover(self):
+        """Drop writes that never reached a committed index record"""
+        snapshots = self._count('index')
+        self._truncate('index', snapshots)
+        if snapshots:
+            last = self._last_record('index', snapshots)
+            nodes = int(last['node_start'] + last['node_count'])
+            endpoints = int(last['endpoint_start'] + last['endpoint_count'])
+            edges = int(last['edge_start'] + last['edge_count'])
+        else:
+            nodes = endpoints = edges = 0
+        self._truncate('node_names', nodes)
+        for column in _NODE_COLUMNS:
+            self._truncate(f'node_{column}', nodes * (4 if column == 'metrics' else 1))
+        self._truncate('endpoints', endpoints)
+        for column in _EDGE_COLUMNS:
+            self._truncate(f'edge_{column}', edges)
+
+        diagrams = self._count('diagrams')
+        self._truncate('diagrams', diagrams)
+        points = 0
+        if diagrams:
+            last = self._last_record('diagrams', diagrams)
+            points = int(last['start'] + last['count'])
+        self._truncate('points', 2 * points)
+
+        vocab_path = os.path.join(self.path, 'vocab.jsonl')
+        if os.path.exists(vocab_path):
+            with open(vocab_path) as f:
+                lines = f.readlines()
+            if len(lines) != snapshots or (lines and not lines[-1].endswith('\n')):
+                with open(vocab_path, 'w') as f:
+                    f.writelines(lines[:snapshots])
+
+    def _last_record(self, name, count):
+        dtype = self._files[name]
+        return np.fromfile(self._file(name), dtype, count=1, offset=(count - 1) * dtype.itemsize)[0]
+
+    def _truncate(self, name, records):
+        path = self._file(name)
+        if os.path.exists(path):
+            size = records * self._files[name].itemsize
+            if os.path.getsize(path) > size:
+                os.truncate(path, size)
+
+    def _map(self, name):
+        dtype = self._files[name]
+        if self._count(name) == 0:
+            return np.empty(0, dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode='r')[:self._count(name)]
+
+    @property
+    def maps(self):
+        if self._maps is None:
+            self._maps = {name: self._map(name) for name in self._files}
+        return self._maps
+
+    def refresh(self):
+        """Pick up snapshots appended since the maps were opened"""
+        self._maps = None
+        self._diagram_lookup = None
+        self._vocab = self._read_vocab()
+
+    def close(self):
+        self._maps = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._vocab)
+
+    @property
+    def timestamps(self):
+        return self.maps['index']['timestamp'].view('datetime64[us]')
+
+    def search(self, start=None, end=None):
+        """Snapshot ids with ``start <= timestamp < end``"""
+        ts = self.maps['index']['timestamp']
+        lo = 0 if start is None else int(np.searchsorted(ts, _ticks(start), 'left'))
+        hi = len(ts) if end is None else int(np.searchsorted(ts, _ticks(end), 'left'))
+        return range(lo, max(lo, hi))
+
+    def nodes(self, snapshot):
+        """``NodeTable`` of a snapshot, backed by the memory maps"""
+        rec, maps = self.maps['index'][snapshot], self.maps
+        lo, n = int(rec['node_start']), int(rec['node_count'])
+        vocab = self._vocab[snapshot]
+        return NodeTable(
+            names=maps['node_names'][lo:lo + n],
+            zone_codes=maps['node_zone_codes'][lo:lo + n],
+            zones=vocab['zones'],
+            metrics=maps['node_metrics'][4 * lo:4 * (lo + n)].reshape(4, n).T,
+            heartbeats=maps['node_heartbeats'][lo:lo + n].view('datetime64[us]'),
+            flags=maps['node_flags'][lo:lo + n],
+            service_mask=maps['node_service_mask'][lo:lo + n],
+            services=vocab['services'],
+        )
+
+    def dependencies(self, snapshot):
+        """``DependencyTable`` of a snapshot, backed by the memory maps"""
+        rec, maps = self.maps['index'][snapshot], self.maps
+        lo, n = int(rec['edge_start']), int(rec['edge_count'])
+        e_lo, e_n = int(rec['endpoint_start']), int(rec['endpoint_count'])
+        return DependencyTable(
+            maps['edge_sources'][lo:lo + n],
+            maps['edge_targets'][lo:lo + n],
+            maps['edge_latency_ms'][lo:lo + n],
+            maps['edge_active'][lo:lo + n],
+            endpoints=maps['endpoints'][e_lo:e_lo + e_n],
+        )
+
+    def diagrams(self, snapshot, kind):
+        """Stored diagrams of ``kind`` for a snapshot, None if never computed"""
+        if self._diagram_lookup is None:
+            lookup = {}
+            for row, rec in enumerate(self.maps['diagrams']):
+                key = (int(rec['snapshot']), int(rec['kind']))
+                if rec['dim'] == 0:
+                    lookup[key] = []  # a new write of this key starts at H0
+                lookup[key].append(row)
+            self._diagram_lookup = lookup
+        rows = self._diagram_lookup.get((snapshot, KINDS.index(kind)))
+        if rows is None:
+            return None
+        records, points = self.maps['diagrams'], self.maps['points'].reshape(-1, 2)
+        return [points[int(records[r]['start']):int(records[r]['start'] + records[r]['count'])]
+                for r in rows]
+
+    def append(self, timestamp, nodes, service_deps, diagrams=None):
+        """Write one snapshot (and optionally its diagrams); returns its id
+
+        ``nodes`` and ``service_deps`` may be tables or lists;
+        ``diagrams`` maps a kind to its list of diagrams.
+        """
+        self._require_writable()
+        if not isinstance(nodes, NodeTable):
+            nodes = NodeTable.from_nodes(nodes)
+        if not isinstance(service_deps, DependencyTable):
+            service_deps = DependencyTable.from_dependencies(service_deps)
+        ticks = _ticks(timestamp)
+        count = len(self)
+        if count and ticks < int(self._last_record('index', count)['timestamp']):
+            raise ValueError("Snapshots must be appended in timestamp order")
+        for names in (nodes.names, service_deps.endpoints):
+            if names.dtype.itemsize > self.name_dtype.itemsize:
+                raise ValueError(f"Names longer than {self.name_dtype.itemsize} bytes")
+
+        record = np.zeros(1, INDEX_DTYPE)
+        record['timestamp'] = ticks
+        record['node_start'], record['node_count'] = self._count('node_names'), len(nodes)
+        record['endpoint_start'] = self._count('endpoints')
+        record['endpoint_count'] = len(service_deps.endpoints)
+        record['edge_start'], record['edge_count'] = self._count('edge_sources'), len(service_deps)
+
+        self._write('node_names', nodes.names)
+        self._write('node_zone_codes', nodes.zone_codes)
+        self._write('node_metrics', nodes.metrics.T)  # column runs, see nodes()
+        self._write('node_heartbeats', nodes.heartbeats.view('<i8'))
+        self._write('node_flags', nodes.flags)
+        self._write('node_service_mask', nodes.service_mask)
+        self._write('endpoints', service_deps.endpoints)
+        for column in _EDGE_COLUMNS:
+            self._write(f'edge_{column}', getattr(service_deps, column))
+        vocab = {'zones': list(nodes.zones), 'services': list(nodes.services)}
+        with open(os.path.join(self.path, 'vocab.jsonl'), 'a') as f:
+            f.write(json.dumps(vocab) + '\n')
+        self._write('index', record)
+
+        self._vocab.append(vocab)
+        self._maps = None
+        for kind, dgms in (diagrams or {}).items():
+            self.put_diagrams(count, kind, dgms)
+        return count
+
+    def put_diagrams(self, snapshot, kind, dgms):
+        """Store the diagrams of ``kind`` computed for an existing snapshot"""
+        self._require_writable()
+        if not 0 <= snapshot < len(self):
+            raise IndexError(f"No snapshot {snapshot}")
+        records = np.zeros(len(dgms), DIAGRAM_DTYPE)
+        start = self._count('points') // 2
+        for dim, d in enumerate(dgms):
+            d = np.asarray(d, dtype='<f4').reshape(-1, 2)
+            records[dim] = (snapshot, KINDS.index(kind), dim, start, len(d))
+            self._write('points', d)
+            start += len(d)
+        self._write('diagrams', records)
+        self._maps = None
+        self._diagram_lookup = None
+
+    def replay(self, start=None, end=None, topology=None, maxdim=1):
+        """Yield ``(timestamp, nodes, service_deps, diagrams)`` in time order
+
+        ``diagrams`` maps each kind to its stored diagrams. When a snapshot
+        lacks them and ``topology`` (a ``TopologyAnalyzer``) is given, they
+        are computed and, if the store is writable, saved for next time.
+        """
+        for snapshot in self.search(start, end):
+            nodes, deps = self.nodes(snapshot), self.dependencies(snapshot)
+            diagrams = {kind: self.diagrams(snapshot, kind) for kind in KINDS}
+            if topology is not None:
+                compute = {
+                    'metric': lambda: topology.compute_metric_persistence(nodes, maxdim=maxdim),
+                    'network': lambda: topology.compute_network_persistence(
+                        deps, sparse=True, maxdim=maxdim),
+                }
+                for kind in KINDS:
+                    if diagrams[kind] is None:
+                        diagrams[kind] = compute[kind]()
+                        if self.mode == 'a':
+                            self.put_diagrams(snapshot, kind, diagrams[kind])
+            yield self.timestamps[snapshot], nodes, deps, diagrams
+
+    def _write(self, name, array):
+        with open(self._file(name), 'ab') as f:
+            np.ascontiguousarray(array, dtype=self._files[name]).tofile(f)
+
+    def _require_writable(self):
+        if self.mode != 'a':
+            raise PermissionError("Store opened read-only")
+
+
+def _ticks(timestamp):
+    """Microseconds since the epoch of a datetime or datetime64
+
+    Aware datetimes are converted to UTC; naive ones are taken as UTC.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is not None:
+            timestamp = timestamp.astimezone(timezone.utc)
+        timestamp = np.datetime64(timestamp.replace(tzinfo=None))
+    return int(np.datetime64(timestamp, 'us').astype('<i8'))
@@ -0,0 +1,145 @@
+# tdak/synthetic.py
+from datetime import datetime, timedelta
+import numpy as np
+from tdak.network import ClusterGenerator, DependencyTable, NodeTable
+
+TOPOLOGIES = ('mesh', 'layered')
+
+# Same-zone and cross-zone base latencies, as in ClusterGenerator
+ZONE_LATENCY_MS = (10.0, 150.0)
+
+
+class SyntheticClusterGenerator(ClusterGenerator):
+    """Vectorized generator for production-sized clusters
+
+    Nodes and dependencies are drawn as whole columns straight into a
+    ``NodeTable`` and ``DependencyTable``, so a 100k-node cluster with
+    millions of dependencies takes seconds. Two dependency topologies are
+    available:
+
+    - ``'mesh'``: a service mesh whose in-degrees follow a power law; each
+      node gets a Poisson(``mean_degree``) number of calls whose targets are
+      drawn with probability proportional to ``rank ** -exponent``.
+    - ``'layered'``: a microservice DAG of ``layers`` tiers (ingress first);
+      calls go from a tier to the next one, and the same popularity skew
+      applies within the target tier. Ingress nodes make up tier 0.
+
+    A fraction ``cross_zone`` of calls leave the caller's zone. Self-loops
+    and duplicate pairs are dropped. Failure injection is inherited, so the
+    result is a drop-in replacement for ``ClusterGenerator`` output.
+    """
+
+    def __init__(self, num_nodes=1000, num_zones=3, topology='mesh', mean_degree=4.0,
+                 exponent=1.0, cross_zone=0.2, layers=4, latency_jitter=0.25, seed=None):
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"topology must be one of {TOPOLOGIES}")
+        if not 0 <= cross_zone <= 1:
+            raise ValueError("cross_zone must be in [0, 1]")
+        super().__init__(num_zones, seed)
+        self.num_nodes = num_nodes
+        self.topology = topology
+        self.mean_degree = mean_degree
+        self.exponent = exponent
+        self.cross_zone = cross_zone
+        self.layers = layers
+        self.latency_jitter = latency_jitter
+
+    def generate_cluster(self, as_table=True):
+        """A ``NodeTable`` (or ``Node`` list) of ``num_nodes`` nodes; sets ``service_deps``"""
+        nodes, layer = self._generate_nodes()
+        self.service_deps = self._generate_dependencies(nodes, layer)
+        self.node_counter += len(nodes)
+        if not as_table:
+            self.service_deps = self.service_deps.to_dependencies()
+            return nodes.to_nodes()
+        return nodes
+
+    def _generate_nodes(self):
+        n, rng = self.num_nodes, self.rng
+        zone_codes = rng.integers(len(self.zones), size=n)
+        ids = np.arange(self.node_counter + 1, self.node_counter + n + 1).astype('S')
+        names = np.char.add(np.char.add(np.asarray(self.zones, dtype='S')[zone_codes],
+                                        b'-node-'), ids)
+        metrics = np.empty((n, 4), dtype=np.float32, order='F')
+        metrics[:, 0] = rng.beta(2, 5, n)
+        metrics[:, 1] = rng.beta(2, 5, n)
+        metrics[:, 2] = rng.poisson(3, n)
+        metrics[:, 3] = rng.beta(1, 3, n)
+        if self.topology == 'layered':
+            # Tiers shrink towards the front: few ingress nodes, many backends
+            weights = np.arange(1, self.layers + 1, dtype=float)
+            layer = rng.choice(self.layers, size=n, p=weights / weights.sum())
+            ingress = layer == 0
+        else:
+            layer = np.zeros(n, dtype=np.int64)
+            ingress = rng.random(n) < 0.2
+        nodes = NodeTable(names, zone_codes, self.zones, metrics,
+                          np.full(n, np.datetime64(datetime.now(), 'us')),
+                          service_mask=ingress.astype(np.uint32), services=['ingress'])
+        return nodes, layer
+
+    def _generate_dependencies(self, nodes, layer):
+        n, rng = len(nodes), self.rng
+        zones = nodes.zone_codes.astype(np.int64)
+        num_zones = len(self.zones)
+        # Per-node popularity, shuffled so it is independent of zone and tier
+        popularity = rng.permutation(np.arange(1, n + 1, dtype=float) ** -self.exponent)
+
+        # Bucket nodes by (tier, zone): targets are sampled inside one bucket
+        bucket = layer * num_zones + zones
+        order = np.argsort(bucket, kind='stable')
+        cumulative = np.concatenate([[0.0], np.cumsum(popularity[order])])
+        bounds = np.searchsorted(bucket[order], np.arange(self.layers * num_zones + 1))
+
+        sources = np.repeat(np.arange(n), rng.poisson(self.mean_degree, n))
+        if self.topology == 'layered':
+            sources = sources[layer[sources] < self.layers - 1]
+        target_zone = zones[sources]
+        leaving = rng.random(len(sources)) < self.cross_zone
+        if num_zones > 1:
+            shift = rng.integers(1, num_zones, size=int(leaving.sum()))
+            target_zone[leaving] = (target_zone[leaving] + shift) % num_zones
+        target_layer = layer[sources] + (self.topology == 'layered')
+        target_bucket = target_layer * num_zones + target_zone
+
+        lo, hi = bounds[target_bucket], bounds[target_bucket + 1]
+        keep = hi > lo  # empty buckets have nobody to call
+        sources, lo, hi = sources[keep], lo[keep], hi[keep]
+        # Inverse-CDF sampling of the popularity weights within each bucket
+        u = cumulative[lo] + rng.random(len(sources)) * (cumulative[hi] - cumulative[lo])
+        slots = np.clip(np.searchsorted(cumulative, u, side='right') - 1, lo, hi - 1)
+        targets = order[slots]
+
+        pairs = np.unique(sources[sources != targets] * n + targets[sources != targets])
+        sources, targets = pairs // n, pairs % n
+        crossing = zones[sources] != zones[targets]
+        latency = np.where(crossing, ZONE_LATENCY_MS[1], ZONE_LATENCY_MS[0])
+        if self.latency_jitter:
+            latency = latency * rng.lognormal(0.0, self.latency_jitter, len(latency))
+        return DependencyTable(sources, targets, latency, endpoints=nodes.names)
+
+    def stream_to_store(self, store, snapshots, interval=timedelta(minutes=1),
+                        start=None, drift=0.02, failure_type=None, failure_at=None):
+        """Append a drifting time series of snapshots to a ``SnapshotStore``
+
+        One cluster is generated, then each further snapshot perturbs the
+        metrics by a clipped Gaussian random walk of scale ``drift``.
+        ``failure_type`` is injected at snapshot ``failure_at`` and persists
+        from there on. Only the current snapshot is held in memory. Returns
+        the ids of the appended snapshots.
+        """
+        nodes = self.generate_cluster(as_table=True)
+        timestamp = start or datetime.now()
+        ids = []
+        for i in range(snapshots):
+            if i:
+                nodes = nodes.copy()
+                step = self.rng.normal(0.0, drift, (len(nodes), 4)).astype(np.float32)
+                step[:, 2] = 0  # pod counts stay integral
+                bounded = [0, 1, 3]  # cpu, memory and storage are fractions
+                nodes.metrics += step
+                nodes.metrics[:, bounded] = np.clip(nodes.metrics[:, bounded], 0, 1)
+            if failure_type is not None and i == failure_at:
+                nodes = self.inject_failure(nodes, failure_type)
+            ids.append(store.append(timestamp + i * interval, nodes, self.service_deps))
+        return ids
@@ -1,6 +1,6 @@
 # tests/test_analysis.py
-from tdak.analysis import ClusterAnalyzer
-from tdak.network import Node
+from tdak.analysis import ClusterAnalyzer, OutlierDetector
+from tdak.network import ClusterGenerator, Node
 import numpy as np
 
 def test_analysis_signature_matching():
@@ -13,4 +13,56 @@ def test_analysis_signature_matching():
     }
     
     result = analyzer.validate_signature(dummy_report, "zone_outage")
-    assert isinstance(result, bool)
\ No newline at end of file
+    assert isinstance(result, bool)
+
+
+def test_signature_threshold_widened_by_approximation_bound():
+    analyzer = ClusterAnalyzer()
+    report = {
+        'metric': {'h0': {'wasserstein': 1.2}},
+        'network': {'h0': {'component_diff': 2}},
+    }
+    assert analyzer.validate_signature(report, "zone_outage")
+
+    report['approximation_bound'] = 0.5
+    assert not analyzer.validate_signature(report, "zone_outage")
+
+
+def test_exceeds_reads_requested_dimension():
+    analyzer = ClusterAnalyzer()
+    before = [np.array([[0.0, 1.0]]), np.array([[0.2, 0.3]])]
+    after = [np.array([[0.0, 4.0]]), np.array([[0.2, 0.3]])]
+    assert analyzer.exceeds(before, after, 0, 1.5)
+    assert not analyzer.exceeds(before, after, 1, 0.1)
+
+
+def test_outlier_detector_flags_every_metric_column():
+    nodes = ClusterGenerator(3, seed=0).generate_cluster(as_table=True)
+    nodes.metrics[0, 3] = 1e6  # storage
+    nodes.metrics[1, 0] = 1e6  # cpu
+    result = OutlierDetector().detect(nodes)
+    assert result["counts"]["storage_usage"] >= 1 and result["counts"]["cpu_load"] >= 1
+    assert np.argsort(result["scores"])[-2:].tolist() in ([0, 1], [1, 0])
+    assert result["mahalanobis"] is None
+    # Node objects and tables score identically
+    assert np.allclose(OutlierDetector().detect(nodes.to_nodes())["scores"], result["scores"])
+
+
+def test_outlier_detector_streams_covariance():
+    gen = ClusterGenerator(3, seed=1)
+    batches = [gen.generate_cluster(as_table=True) for _ in range(3)]
+    detector = OutlierDetector()
+    for batch in batches:
+        detector.partial_fit(batch)
+    stacked = np.vstack([b.metrics for b in batches]).astype(float)
+    assert np.allclose(detector.mean, stacked.mean(axis=0))
+    assert np.allclose(detector.covariance, np.cov(stacked, rowvar=False))
+    assert len(detector.detect(batches[0])["mahalanobis"]) == len(batches[0])
+
+
+def test_report_keeps_storage_keys():
+    nodes = ClusterGenerator(3, seed=0).generate_cluster()
+    dgms = [np.array([[0.0, 1.0]]), np.empty((0, 2))]
+    report = ClusterAnalyzer().analyze(dgms, dgms, dgms, dgms, None, nodes)
+    assert report["storage_outliers"] == report["outliers"]["counts"]["storage_usage"]
+    assert set(report["metric"]["storage_stats"]) == {"mean", "max", "outliers"}
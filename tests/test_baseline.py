@@ -0,0 +1,114 @@
+# tests/test_baseline.py
+import asyncio
+import numpy as np
+import pytest
+from tdak.baseline import FEATURES, P2Quantile, RollingBaseline, RunningStats
+from tdak.network import ClusterGenerator
+from tdak.pipeline import DetectionPipeline
+from tdak.topology import TopologyAnalyzer
+
+
+def _report(value):
+    return {source: {dim: {'wasserstein': value, 'entropy_diff': -value}
+                     for dim in ('h0', 'h1')}
+            for source in ('metric', 'network')}
+
+
+def test_running_stats_match_numpy():
+    data = np.random.default_rng(0).normal(3, 2, 500)
+    stats = RunningStats()
+    for x in data:
+        stats.update(x)
+    assert stats.mean == pytest.approx(data.mean())
+    assert stats.std == pytest.approx(data.std(ddof=1))
+
+
+@pytest.mark.parametrize("p", [0.5, 0.95])
+def test_p2_quantile_tracks_empirical_quantile(p):
+    data = np.random.default_rng(1).exponential(1.0, 5000)
+    estimator = P2Quantile(p)
+    for x in data:
+        estimator.update(x)
+    assert estimator.value == pytest.approx(np.quantile(data, p), rel=0.05)
+
+
+def test_baseline_flags_outlier_and_keeps_it_out():
+    rng = np.random.default_rng(2)
+    baseline = RollingBaseline(warmup=20)
+    for x in rng.normal(1.0, 0.1, 50):
+        assert not baseline.observe(_report(x))["anomalous"]
+    assert baseline.count == 50
+
+    result = baseline.observe(_report(5.0))
+    assert result["anomalous"] and result["score"] > baseline.threshold
+    assert "metric/h0/wasserstein" in result["above_quantile"][0.99]
+    assert baseline.count == 50
+    assert len(result["zscores"]) == len(FEATURES)
+
+
+def test_departure_from_constant_baseline_is_flagged():
+    baseline = RollingBaseline()
+    for _ in range(30):
+        assert baseline.observe(_report(0.0))["score"] == 0
+    result = baseline.observe(_report(50.0))
+    assert result["anomalous"] and baseline.count == 30
+
+
+def test_no_change_after_steady_change_is_not_anomalous():
+    rng = np.random.default_rng(3)
+    baseline = RollingBaseline()
+    for w in rng.normal(0.5, 0.02, 40):
+        baseline.observe({source: {dim: {'wasserstein': w, 'entropy_diff': 0.0}
+                                   for dim in ('h0', 'h1')}
+                          for source in ('metric', 'network')})
+    result = baseline.observe(_report(0.0))
+    assert result["zscores"]["metric/h0/wasserstein"] == 0.0
+    assert not result["anomalous"]
+
+
+def test_push_compares_with_last_normal_diagrams():
+    topo = TopologyAnalyzer()
+    gen = ClusterGenerator(3, seed=0)
+    nodes = gen.generate_cluster(as_table=True)
+    metric = topo.compute_metric_persistence(nodes, maxdim=0)
+    network = topo.compute_network_persistence(gen.service_deps, sparse=True, maxdim=0)
+
+    baseline = RollingBaseline(topology=topo)
+    assert baseline.push(metric, network) is None
+    for _ in range(6):
+        result = baseline.push(metric, network)
+    # Identical snapshots: no change, no score
+    assert result["score"] == 0 and not result["anomalous"]
+    assert baseline.reference()[0] is metric
+
+
+def test_pipeline_scores_reports_against_baseline():
+    gen = ClusterGenerator(3, seed=0)
+    nodes = gen.generate_cluster(as_table=True)
+
+    async def stream():
+        for _ in range(4):
+            yield nodes, gen.service_deps
+
+    pipeline = DetectionPipeline(maxdim=0, baseline=RollingBaseline(), queue_size=4)
+    asyncio.run(pipeline.run(stream()))
+    assert pipeline.baseline.count == 3
+
+
+def test_pipeline_keeps_comparing_a_persistent_failure_with_the_reference():
+    gen = ClusterGenerator(3, seed=0)
+    nodes = gen.generate_cluster(as_table=True)
+    deps = gen.service_deps.copy()
+    failed = gen.inject_failure(nodes, 'zone_outage')
+    alerts = []
+
+    async def stream():
+        for _ in range(12):
+            yield nodes, deps
+        for _ in range(3):
+            yield failed, gen.service_deps
+
+    pipeline = DetectionPipeline(maxdim=0, baseline=RollingBaseline(), queue_size=16,
+                                 sinks=[alerts.append])
+    asyncio.run(pipeline.run(stream()))
+    assert [a.seq for a in alerts if a.failure_type == 'anomaly'] == [12, 13, 14]
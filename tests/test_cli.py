@@ -0,0 +1,64 @@
+# tests/test_cli.py
+import json
+import subprocess
+import sys
+import pytest
+from tdak.cli import main
+
+
+def _records(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_analyze_emits_ndjson_report(tmp_path):
+    out = tmp_path / "report.ndjson"
+    assert main(["-o", str(out), "analyze", "zone_outage", "--seed", "1", "--profile"]) == 0
+    report, profile = _records(out)
+    assert report["type"] == "report" and report["maxdim"] == 0
+    assert report["failure_type"] == "zone_outage"
+    assert isinstance(report["metric"]["h0"]["wasserstein"], float)
+    assert "tdak_stage_seconds_bucket" in profile["prometheus"]
+
+
+def test_replay_reads_snapshots_written_by_analyze(tmp_path):
+    store = tmp_path / "history"
+    main(["-o", str(tmp_path / "a.ndjson"), "analyze", "dns_failure", "--seed", "2",
+          "--store", str(store)])
+    out = tmp_path / "replay.ndjson"
+    assert main(["-o", str(out), "replay", str(store)]) == 0
+    [report] = _records(out)
+    expected = _records(tmp_path / "a.ndjson")[0]
+    assert report["metric"]["h0"] == expected["metric"]["h0"]
+    assert report["network"]["h1"] == expected["network"]["h1"]
+
+
+def test_bench_reports_every_trial(tmp_path):
+    out = tmp_path / "bench.ndjson"
+    main(["-o", str(out), "bench", "--trials", "2", "--maxdim", "0"])
+    records = _records(out)
+    assert [r["type"] for r in records] == ["trial", "trial", "summary"]
+    assert records[-1]["mean_ms"]["analyze"] > 0
+
+
+def test_default_analyze_never_loads_ripser(tmp_path):
+    code = ("import sys; from tdak.cli import main; "
+            f"main(['-o', {str(tmp_path / 'r.ndjson')!r}, 'analyze', 'pod_overload']); "
+            "assert 'ripser' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_headless_imports_stay_light():
+    code = ("import sys, tdak.cli; assert 'numpy' not in sys.modules; "
+            "import tdak.analysis, tdak.topology; "
+            "assert not {'matplotlib', 'sklearn', 'persim'} & set(sys.modules)")
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_analyze_plots_diagram_sets(tmp_path):
+    pytest.importorskip("matplotlib")
+    pytest.importorskip("persim")
+    png = tmp_path / "dns.png"
+    assert main(["-o", str(tmp_path / "report.ndjson"), "analyze", "dns_failure",
+                 "--seed", "3", "--plot", str(png)]) == 0
+    assert png.stat().st_size > 0
@@ -0,0 +1,63 @@
+# tests/test_diagrams.py
+import pickle
+import numpy as np
+import pytest
+from tdak.analysis import ClusterAnalyzer
+from tdak.diagrams import PersistenceDiagramSet
+from tdak.network import ClusterGenerator
+from tdak.topology import TopologyAnalyzer
+
+
+@pytest.fixture
+def raw():
+    rng = np.random.default_rng(0)
+    births = rng.uniform(0, 1, 50)
+    return [np.column_stack([np.zeros(30), rng.uniform(0, 2, 30)]),
+            np.column_stack([births, births + rng.exponential(0.3, 50)]),
+            np.empty((0, 2))]
+
+
+def test_set_behaves_like_diagram_list(raw):
+    dgms = PersistenceDiagramSet.from_diagrams(raw)
+    assert len(dgms) == 3 and [len(d) for d in dgms] == [30, 50, 0]
+    assert dgms[1].dtype == np.float32 and np.allclose(dgms[1], raw[1])
+    assert np.allclose(dgms[-2], raw[1]) and len(dgms[:2]) == 2
+    assert not dgms[0].flags.writeable
+    assert dgms.dimension(5).shape == (0, 2)
+    assert PersistenceDiagramSet.from_diagrams(dgms) is dgms
+    assert dgms.nbytes < 0.6 * sum(d.nbytes for d in raw)
+
+
+def test_summaries_are_cached_and_match_definition(raw):
+    dgms = PersistenceDiagramSet.from_diagrams(raw)
+    lifetimes = dgms.lifetimes(1)
+    assert dgms.lifetimes(1) is lifetimes
+    p = lifetimes / lifetimes.sum()
+    assert dgms.entropy(1) == pytest.approx(-np.sum(p * np.log(p + 1e-9)))
+    assert dgms.total_persistence(0) == pytest.approx((raw[0][:, 1]).sum(), rel=1e-6)
+    assert dgms.entropy(2) == dgms.entropy(7) == 0.0
+
+
+def test_serialization_round_trips(raw):
+    dgms = PersistenceDiagramSet.from_diagrams(raw)
+    for copy in (PersistenceDiagramSet.from_bytes(dgms.to_bytes()),
+                 pickle.loads(pickle.dumps(dgms))):
+        assert len(copy) == len(dgms)
+        assert all(np.array_equal(a, b) for a, b in zip(copy, dgms))
+
+
+def test_analyzers_share_sets_and_report_entropy_changes():
+    gen = ClusterGenerator(3, seed=0)
+    nodes = gen.generate_cluster(as_table=True)
+    topo = TopologyAnalyzer(cache_size=4)
+    before = topo.compute_metric_persistence(nodes, maxdim=1)
+    assert isinstance(before, PersistenceDiagramSet)
+    assert topo.compute_metric_persistence(nodes, maxdim=1) is before
+
+    failed = gen.inject_failure(nodes, 'storage_failure')
+    after = topo.compute_metric_persistence(failed, maxdim=1)
+    network = topo.compute_network_persistence(gen.service_deps, sparse=True, maxdim=1)
+    report = ClusterAnalyzer().analyze(before, after, network, network, None, failed)
+    expected = after.entropy(0) - before.entropy(0)
+    assert report['metric']['h0']['entropy_diff'] == pytest.approx(expected)
+    assert topo.analyze_changes(before, after)['h0']['entropy_diff'] == pytest.approx(expected)
@@ -0,0 +1,98 @@
+# tests/test_distances.py
+import numpy as np
+import pytest
+from persim import wasserstein
+from tdak.distances import exceeds, pairwise_wasserstein, sliced_wasserstein
+
+
+def _random_diagram(rng, size):
+    births = rng.uniform(0, 1, size)
+    return np.column_stack([births, births + rng.exponential(0.5, size)])
+
+
+@pytest.fixture
+def diagram_sets():
+    rng = np.random.default_rng(0)
+    return [
+        [_random_diagram(rng, rng.integers(0, 12)), _random_diagram(rng, rng.integers(0, 6))]
+        for _ in range(6)
+    ]
+
+
+def test_pairwise_exact_matches_persim(diagram_sets):
+    """Each cell equals a one-off persim.wasserstein call"""
+    matrices = pairwise_wasserstein(diagram_sets)
+    for dim in (0, 1):
+        assert matrices[dim].shape == (6, 6)
+        assert np.allclose(matrices[dim], matrices[dim].T)
+        assert np.allclose(np.diag(matrices[dim]), 0)
+        assert matrices[dim][1, 4] == pytest.approx(
+            wasserstein(diagram_sets[1][dim], diagram_sets[4][dim]))
+
+
+def test_pairwise_against_signatures(diagram_sets):
+    """Snapshots vs stored signatures gives an N x M matrix"""
+    matrices = pairwise_wasserstein(diagram_sets[:4], diagram_sets[4:], dims=(0,))
+    assert list(matrices) == [0]
+    assert matrices[0].shape == (4, 2)
+    assert matrices[0][3, 1] == pytest.approx(
+        wasserstein(diagram_sets[3][0], diagram_sets[5][0]))
+
+
+def test_pairwise_process_pool_matches_serial(diagram_sets):
+    serial = pairwise_wasserstein(diagram_sets, dims=(0,))
+    pooled = pairwise_wasserstein(diagram_sets, dims=(0,), n_jobs=2)
+    assert np.allclose(serial[0], pooled[0])
+
+
+@pytest.mark.parametrize("method", ["exact", "sliced"])
+def test_pairwise_process_pool_matches_serial_against_signatures(diagram_sets, method):
+    serial = pairwise_wasserstein(diagram_sets[:4], diagram_sets[4:], method=method)
+    pooled = pairwise_wasserstein(diagram_sets[:4], diagram_sets[4:], method=method, n_jobs=2)
+    for dim in (0, 1):
+        assert np.allclose(serial[dim], pooled[dim])
+
+
+def test_sliced_respects_upper_bound(diagram_sets):
+    """Sliced distance never exceeds twice the exact distance"""
+    exact = pairwise_wasserstein(diagram_sets)
+    sliced = pairwise_wasserstein(diagram_sets, method="sliced")
+    for dim in (0, 1):
+        assert (sliced[dim] <= 2 * exact[dim] + 1e-9).all()
+
+
+def test_sliced_identical_and_empty():
+    dgm = np.array([[0.0, 1.0], [0.5, 2.0]])
+    assert sliced_wasserstein(dgm, dgm) == pytest.approx(0.0)
+    assert sliced_wasserstein(np.empty((0, 2)), np.empty((0, 2))) == 0.0
+    assert sliced_wasserstein(dgm, np.empty((0, 2))) > 0
+
+
+def test_exceeds_agrees_with_exact():
+    """Bound-based answer always matches the exact comparison"""
+    rng = np.random.default_rng(1)
+    for _ in range(100):
+        before = [_random_diagram(rng, rng.integers(1, 20))]
+        after = [_random_diagram(rng, rng.integers(1, 20))]
+        threshold = rng.uniform(0, 6)
+        expected = wasserstein(before[0], after[0]) > threshold
+        assert exceeds(before, after, 0, threshold) == expected
+
+
+def test_exceeds_skips_matching_when_bounds_settle(monkeypatch):
+    import tdak.distances
+
+    def fail(*args):
+        raise AssertionError("exact matching should not run")
+    monkeypatch.setattr(tdak.distances, "wasserstein", fail)
+
+    rng = np.random.default_rng(2)
+    before, after = [_random_diagram(rng, 50)], [_random_diagram(rng, 5)]
+    assert exceeds(before, after, 0, 0.1)
+    assert not exceeds(before, after, 0, 1e6)
+
+
+def test_exceeds_empty_side_counts_as_zero():
+    dgm = [np.array([[0.0, 3.0]])]
+    assert not exceeds(dgm, [np.empty((0, 2))], 0, 0.5)
+    assert not exceeds(dgm, dgm, 1, 0.5)
@@ -0,0 +1,51 @@
+# tests/test_evaluation.py
+from tdak.evaluation import STAGES, MonteCarloEvaluator, run_trial, wilson_interval
+
+
+def test_trial_reports_every_stage():
+    result = run_trial(seed=1, failure_type="zone_outage")
+    assert result["failure_type"] == "zone_outage"
+    assert set(result["timings"]) == set(STAGES)
+    assert all(isinstance(v, bool) for v in result["detected"].values())
+
+
+def test_trial_is_reproducible():
+    first = run_trial(seed=5, failure_type="dns_failure")
+    second = run_trial(seed=5, failure_type="dns_failure")
+    assert first["detected"] == second["detected"]
+
+
+def test_wilson_interval_narrows_with_samples():
+    low_small, high_small = wilson_interval(5, 10)
+    low_big, high_big = wilson_interval(500, 1000)
+    assert low_small < 0.5 < high_small
+    assert high_big - low_big < high_small - low_small
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_evaluator_counts_every_trial():
+    evaluator = MonteCarloEvaluator(failure_types=["zone_outage", "storage_failure"],
+                                    batch_size=6, seed=3)
+    summary = evaluator.run(max_trials=12, min_trials=12, ci_width=0.0)
+    assert summary["trials"] == 12
+    zone = summary["failure_types"]["zone_outage"]
+    # Four zone_outage trials out of twelve (two types plus controls)
+    assert zone["true_pos"] + zone["false_neg"] == 4
+    assert summary["stages"]["analyze"]["mean_ms"] > 0
+
+
+def test_evaluator_stops_early_once_settled():
+    evaluator = MonteCarloEvaluator(failure_types=["pod_overload"], batch_size=10)
+    summary = evaluator.run(max_trials=1000, min_trials=10, ci_width=1.0)
+    assert summary["trials"] == 10
+
+
+def test_process_pool_matches_serial():
+    results = []
+    for n_jobs in (1, 2):
+        evaluator = MonteCarloEvaluator(failure_types=["zone_outage", "dns_failure"],
+                                        batch_size=3, n_jobs=n_jobs, seed=7)
+        results.append(evaluator.run(max_trials=12, min_trials=12, ci_width=0.0))
+    serial, pooled = results
+    assert pooled["trials"] == serial["trials"] == 12
+    assert pooled["failure_types"] == serial["failure_types"]
@@ -0,0 +1,198 @@
+# tests/test_k8s.py
+import asyncio
+import json
+from datetime import datetime
+import pytest
+from tdak.k8s import ClusterState, Ingestor, KubeClient, parse_quantity
+
+
+def _node(name, zone, rv, cpu="4", memory="8Gi", disk_pressure="False"):
+    return {
+        "metadata": {"name": name, "resourceVersion": rv,
+                     "labels": {"topology.kubernetes.io/zone": zone}},
+        "status": {
+            "allocatable": {"cpu": cpu, "memory": memory},
+            "conditions": [
+                {"type": "Ready", "status": "True", "lastHeartbeatTime": "2024-01-01T12:00:00Z"},
+                {"type": "DiskPressure", "status": disk_pressure},
+            ],
+        },
+    }
+
+
+def _pod(name, node, rv, phase="Running", critical=None):
+    labels = {"tdak.io/critical-service": critical} if critical else {}
+    return {"metadata": {"name": name, "namespace": "default", "resourceVersion": rv,
+                         "labels": labels},
+            "spec": {"nodeName": node}, "status": {"phase": phase}}
+
+
+def _endpoints(name, nodes, rv):
+    return {"metadata": {"name": name, "namespace": "default", "resourceVersion": rv},
+            "subsets": [{"addresses": [{"ip": "10.0.0.1", "nodeName": n} for n in nodes]}]}
+
+
+class FakeAPIServer:
+    """Just enough of the API server: lists, chunked watch streams, metrics"""
+
+    def __init__(self):
+        self.objects = {
+            "nodes": [_node("node-a", "zone-1", "1"), _node("node-b", "zone-2", "2")],
+            "pods": [_pod("web-1", "node-a", "3", critical="ingress")],
+            "endpoints": [_endpoints("web", ["node-a", "node-b"], "4")],
+        }
+        self.metrics = [{"metadata": {"name": "node-a"}, "usage": {"cpu": "2", "memory": "2Gi"}}]
+        self.watchers = {kind: asyncio.Queue() for kind in self.objects}
+        self.connections = 0
+        self.lists = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return f"http://127.0.0.1:{self.server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def push(self, kind, event_type, obj):
+        await self.watchers[kind].put({"type": event_type, "object": obj})
+
+    async def _serve(self, reader, writer):
+        self.connections += 1
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                path = request.split(b" ")[1].decode()
+                if "watch=1" in path:
+                    await self._stream(writer, path.split("?")[0].rsplit("/", 1)[1])
+                    return
+                if path.startswith("/apis/metrics.k8s.io"):
+                    payload = {"items": self.metrics}
+                else:
+                    self.lists += 1
+                    kind = path.rsplit("/", 1)[1]
+                    payload = {"metadata": {"resourceVersion": "10"}, "items": self.objects[kind]}
+                body = json.dumps(payload).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer, kind):
+        writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+        while True:
+            line = json.dumps(await self.watchers[kind].get()).encode() + b"\n"
+            # Split events across chunks the way real proxies sometimes do
+            for part in (line[:7], line[7:]):
+                writer.write(b"%x\r\n%s\r\n" % (len(part), part))
+            await writer.drain()
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+def test_parse_quantity():
+    assert parse_quantity("250m") == pytest.approx(0.25)
+    assert parse_quantity("4Gi") == 4 * 2**30
+    assert parse_quantity("1500k") == 1.5e6
+    assert parse_quantity("2") == 2.0
+
+
+def test_list_then_watch_updates_state_in_place():
+    async def scenario():
+        server = FakeAPIServer()
+        url = await server.start()
+        ingestor = Ingestor(KubeClient(url), metrics_interval=0)
+        try:
+            await ingestor.start()
+            state = ingestor.state
+            node_a = state.nodes["node-a"]
+            assert node_a.zone == "zone-1"
+            assert node_a.cpu_load == pytest.approx(0.5)
+            assert node_a.memory_usage == pytest.approx(0.25)
+            assert node_a.running_pods == 1
+            assert node_a.critical_services == ["ingress"]
+            assert node_a.last_heartbeat == datetime(2024, 1, 1, 12, 0, 0)
+            [dep] = state.service_deps
+            assert (dep.source, dep.target, dep.latency_ms) == ("node-a", "node-b", 150.0)
+
+            await server.push("pods", "ADDED", _pod("web-2", "node-a", "11"))
+            await server.push("nodes", "MODIFIED",
+                              _node("node-a", "zone-1", "12", disk_pressure="True"))
+            await server.push("endpoints", "DELETED", _endpoints("web", [], "13"))
+            await _wait_for(lambda: not state.service_deps and node_a.storage_usage == 1.0)
+
+            # Same Node object, mutated in place
+            assert state.nodes["node-a"] is node_a
+            assert node_a.running_pods == 2
+            assert ingestor.resource_versions == {"nodes": "12", "pods": "11", "endpoints": "13"}
+            assert server.lists == 3, "watch deltas must not trigger re-listing"
+        finally:
+            await ingestor.stop()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_expired_watch_relists():
+    async def scenario():
+        server = FakeAPIServer()
+        url = await server.start()
+        ingestor = Ingestor(KubeClient(url), metrics_interval=0, retry_delay=0.01)
+        try:
+            await ingestor.start()
+            assert ingestor.state.nodes["node-a"].running_pods == 1
+            server.objects["nodes"] = [_node("node-b", "zone-2", "20")]
+            await server.push("nodes", "ERROR", {"kind": "Status", "code": 410})
+            await _wait_for(lambda: "node-a" not in ingestor.state.nodes)
+            assert server.lists == 4
+            # web-1 was deleted while the pod watch was down
+            server.objects["pods"] = [_pod("web-2", "node-b", "21")]
+            await server.push("pods", "ERROR", {"kind": "Status", "code": 410})
+            await _wait_for(lambda: server.lists == 5)
+            await _wait_for(lambda: ingestor.state.keys("pods") == {("default", "web-2")})
+            assert ingestor.state.nodes["node-b"].running_pods == 1
+        finally:
+            await ingestor.stop()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_requests_reuse_pooled_connections():
+    async def scenario():
+        server = FakeAPIServer()
+        url = await server.start()
+        client = KubeClient(url, pool_size=2)
+        try:
+            await asyncio.gather(*(client.get_json("/api/v1/nodes") for _ in range(20)))
+            assert client.connections_opened <= 2
+            assert server.connections <= 2
+        finally:
+            await client.close()
+            await server.stop()
+
+    asyncio.run(scenario())
+
+
+def test_pod_moves_only_touch_affected_nodes():
+    state = ClusterState()
+    state.apply_node("ADDED", _node("node-a", "zone-1", "1"))
+    state.apply_node("ADDED", _node("node-b", "zone-1", "2"))
+    state.apply_pod("ADDED", _pod("job", "node-a", "3"))
+    assert state.nodes["node-a"].running_pods == 1
+
+    state.apply_pod("MODIFIED", _pod("job", "node-b", "4"))
+    assert state.nodes["node-a"].running_pods == 0
+    assert state.nodes["node-b"].running_pods == 1
+
+    state.apply_endpoints("ADDED", _endpoints("svc", ["node-a", "node-b"], "5"))
+    assert state.service_deps[0].latency_ms == 10.0
@@ -0,0 +1,69 @@
+# tests/test_metrics.py
+import io
+import urllib.request
+from datetime import datetime
+from tdak.metrics import MetricsRegistry, StreamSink, serve_metrics
+from tdak.network import Node
+from tdak.topology import TopologyAnalyzer
+
+
+def _nodes(count):
+    return [
+        Node(f"node{i}", "zone-a", i / count, 0.5, 2, 0.3, [], datetime(2024, 1, 1))
+        for i in range(count)
+    ]
+
+
+def test_render_text_format():
+    registry = MetricsRegistry()
+    registry.inc("cache_hits")
+    registry.inc("cache_hits")
+    registry.set("cache_entries", 3)
+    registry.observe("stage_seconds", 0.003, stage="ripser")
+
+    text = registry.render()
+    assert "# TYPE tdak_cache_hits_total counter" in text
+    assert "tdak_cache_hits_total 2" in text
+    assert "tdak_cache_entries 3" in text
+    assert 'tdak_stage_seconds_bucket{stage="ripser",le="0.005"} 1' in text
+    assert 'tdak_stage_seconds_bucket{stage="ripser",le="0.0025"} 0' in text
+    assert 'tdak_stage_seconds_count{stage="ripser"} 1' in text
+
+
+def test_sinks_receive_every_observation():
+    stream = io.StringIO()
+    registry = MetricsRegistry(sinks=[StreamSink(stream)])
+    with registry.timer("scale"):
+        pass
+    registry.inc("cache_misses")
+    lines = stream.getvalue().splitlines()
+    assert lines[0].startswith('histogram tdak_stage_seconds{stage="scale"}')
+    assert lines[1] == "counter tdak_cache_misses 1"
+
+
+def test_topology_records_stages_and_cache():
+    registry = MetricsRegistry()
+    analyzer = TopologyAnalyzer(cache_size=2, metrics=registry)
+    nodes = _nodes(8)
+    analyzer.compute_metric_persistence(nodes, maxdim=1)
+    analyzer.compute_metric_persistence(nodes, maxdim=1)
+
+    text = registry.render()
+    assert 'tdak_stage_seconds_count{source="metric",stage="ripser"} 1' in text
+    assert 'tdak_stage_seconds_count{stage="scale"} 1' in text
+    assert "tdak_cache_hits_total 1" in text
+    assert "tdak_cache_misses_total 1" in text
+    assert 'tdak_diagram_points_count{dim="0",source="metric"} 2' in text
+    assert 'tdak_filtration_edges_count{source="metric"} 1' in text
+
+
+def test_metrics_endpoint_serves_text():
+    registry = MetricsRegistry()
+    registry.inc("cache_hits")
+    server = serve_metrics(registry, port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            assert "tdak_cache_hits_total 1" in response.read().decode()
+    finally:
+        server.shutdown()
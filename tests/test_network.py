@@ -1,8 +1,14 @@
 #test_network
 # tests/test_network.py
+import dataclasses
 from datetime import datetime
+import numpy as np
 import pytest
-from tdak.network import Node, ServiceDependency
+from tdak.network import (
+    FAILURE_TYPES, ClusterGenerator, DependencyTable, FailureInjector,
+    Node, NodeTable, ServiceDependency, register_failure,
+)
+from tdak.topology import TopologyAnalyzer
 
 class TestNetworkComponents:
     def setup_method(self):
@@ -72,4 +78,143 @@ class TestNetworkComponents:
     def test_inactive_dependency(self):
         """Verify inactive dependencies are tracked correctly"""
         dep = ServiceDependency(**{**self.valid_service_dep_args, "active": False})
-        assert dep.active is False
\ No newline at end of file
+        assert dep.active is False
+
+
+class TestNodeTable:
+    def setup_method(self):
+        now = datetime(2024, 1, 1, 12, 0, 0)
+        self.nodes = [
+            Node("zone-a-node-1", "zone-a", 0.5, 0.25, 3, 0.75, ["ingress"], now),
+            Node("zone-b-node-2", "zone-b", 0.125, 0.5, 1, 0.25, [], now, dns_healthy=False),
+            Node("zone-a-node-3", "zone-a", 1.0, 0.0, 7, 0.5, ["ingress", "dns"], now),
+        ]
+        self.table = NodeTable.from_nodes(self.nodes)
+
+    def test_round_trip(self):
+        """Row views convert back to identical Node objects"""
+        assert len(self.table) == 3
+        assert self.table.to_nodes() == self.nodes
+
+    def test_round_trip_is_float32_precise(self):
+        """Non-dyadic metrics come back within float32 precision"""
+        node = Node("n", "zone-a", 0.3, 0.1, 2, 0.7, [], datetime(2024, 1, 1))
+        [back] = NodeTable.from_nodes([node]).to_nodes()
+        assert back != node
+        assert dataclasses.replace(back, cpu_load=0.3, memory_usage=0.1,
+                                   storage_usage=0.7) == node
+        for field in ("cpu_load", "memory_usage", "storage_usage"):
+            assert getattr(back, field) == pytest.approx(getattr(node, field), rel=1e-7)
+
+    def test_row_view_matches_node(self):
+        """Views expose the Node attributes"""
+        view = self.table[2]
+        assert view.name == "zone-a-node-3"
+        assert view.zone == "zone-a"
+        assert view.running_pods == 7
+        assert view.critical_services == ["ingress", "dns"]
+        assert view.dns_healthy is True
+        assert self.table[1].dns_healthy is False
+
+    def test_view_writes_through_to_columns(self):
+        """Assigning on a view updates the table column"""
+        view = self.table[0]
+        view.storage_usage = 1.0
+        view.dns_healthy = False
+        assert self.table.storage_usage[0] == 1.0
+        assert not self.table.dns_healthy[0]
+
+    def test_pods_read_the_same_through_views_and_features(self):
+        """Fractional pod writes round identically on both feature paths"""
+        self.table.running_pods[:] = [2.6, 3.4, 6.9999]
+        assert [n.running_pods for n in self.table] == [3, 3, 7]
+        assert np.array_equal(TopologyAnalyzer()._feature_matrix(self.table),
+                              TopologyAnalyzer()._feature_matrix(list(self.table)))
+        with pytest.raises(ValueError):
+            self.table[0].running_pods = 2.5
+
+    def test_columns_are_views(self):
+        """Metric columns share memory with the metric block"""
+        assert np.shares_memory(self.table.storage_usage, self.table.metrics)
+        assert self.table.storage_usage.flags['C_CONTIGUOUS']
+
+    def test_masks_and_subtables(self):
+        """Zone codes and service bits select rows"""
+        assert list(self.table.in_zone("zone-a")) == [True, False, True]
+        assert list(self.table.has_service("dns")) == [False, False, True]
+        sub = self.table[self.table.in_zone("zone-a")]
+        assert [n.name for n in sub] == ["zone-a-node-1", "zone-a-node-3"]
+
+    def test_feature_matrix_scales_pods(self):
+        X = self.table.feature_matrix()
+        assert X.shape == (3, 4)
+        assert X[2, 2] == pytest.approx(0.7)
+
+
+class TestFailureInjector:
+    def setup_method(self):
+        gen = ClusterGenerator(num_zones=4, seed=7)
+        self.nodes = gen.generate_cluster(as_table=True)
+        self.deps = gen.service_deps
+
+    def _inject(self, failure_type, seed=0):
+        return FailureInjector(seed).inject(self.nodes, self.deps, failure_type)
+
+    @pytest.mark.parametrize("failure_type", sorted(FAILURE_TYPES))
+    def test_same_seed_same_scenario(self, failure_type):
+        """One seed fully determines the injected failure"""
+        nodes_a, deps_a = self._inject(failure_type, seed=3)
+        nodes_b, deps_b = self._inject(failure_type, seed=3)
+        assert np.array_equal(nodes_a.metrics, nodes_b.metrics)
+        assert np.array_equal(nodes_a.flags, nodes_b.flags)
+        assert np.array_equal(deps_a.active, deps_b.active)
+        assert np.array_equal(deps_a.latency_ms, deps_b.latency_ms)
+
+    @pytest.mark.parametrize("failure_type", sorted(FAILURE_TYPES))
+    def test_inputs_untouched(self, failure_type):
+        metrics, active = self.nodes.metrics.copy(), self.deps.active.copy()
+        self._inject(failure_type)
+        assert np.array_equal(self.nodes.metrics, metrics)
+        assert np.array_equal(self.deps.active, active)
+
+    def test_zone_outage_drops_zone_and_edges(self):
+        nodes, deps = self._inject("zone_outage")
+        dead = set(self.nodes.zones) - {n.zone for n in nodes}
+        assert len(dead) == 1
+        names = {n.name for n in nodes}
+        assert all(sd.source in names and sd.target in names for sd in deps)
+
+    def test_pod_overload_caps_load(self):
+        nodes, _ = self._inject("pod_overload")
+        assert (nodes.cpu_load <= 1.0).all()
+        assert np.array_equal(nodes.running_pods, self.nodes.running_pods + 5)
+
+    def test_dns_failure_disables_half(self):
+        _, deps = self._inject("dns_failure")
+        assert (~deps.active).sum() == len(self.deps) // 2
+
+    def test_register_failure(self, monkeypatch):
+        """New failure types plug into the injector by name"""
+        monkeypatch.setitem(FAILURE_TYPES, "noop", None)
+
+        @register_failure("noop")
+        def _noop(rng, nodes, deps):
+            nodes.cpu_load[:] = 0.0
+            return nodes, deps
+
+        nodes, _ = self._inject("noop")
+        assert not nodes.cpu_load.any()
+
+    def test_generator_routes_tables_to_injector(self):
+        gen = ClusterGenerator(num_zones=3, seed=1)
+        nodes = gen.generate_cluster(as_table=True)
+        assert isinstance(gen.service_deps, DependencyTable)
+        failed = gen.inject_failure(nodes, "storage_failure")
+        assert isinstance(failed, NodeTable)
+        assert (failed.storage_usage >= nodes.storage_usage).all()
+
+    def test_generator_seed_reproducible(self):
+        first = ClusterGenerator(num_zones=3, seed=11).generate_cluster()
+        second = ClusterGenerator(num_zones=3, seed=11).generate_cluster()
+        strip = lambda nodes: [(n.name, n.cpu_load, n.storage_usage) for n in nodes]
+        assert strip(first) == strip(second)
@@ -0,0 +1,103 @@
+# tests/test_pipeline.py
+import asyncio
+import time
+import pytest
+from tdak.analysis import ClusterAnalyzer
+from tdak.k8s import ClusterState
+from tdak.metrics import MetricsRegistry
+from tdak.network import ClusterGenerator
+from tdak.pipeline import DetectionPipeline, LatestQueue, Snapshot, poll_snapshots
+from tdak.topology import TopologyAnalyzer
+
+
+class SlowTopology(TopologyAnalyzer):
+    def compute_metric_persistence(self, nodes, maxdim=2):
+        time.sleep(0.05)
+        return super().compute_metric_persistence(nodes, maxdim)
+
+
+class AlwaysZoneOutage(ClusterAnalyzer):
+    def validate_signature(self, report, failure_type):
+        return failure_type == "zone_outage"
+
+
+async def _cluster_stream(count, delay=0.0, seed=0):
+    gen = ClusterGenerator(3, seed=seed)
+    nodes = gen.generate_cluster(as_table=True)
+    for _ in range(count):
+        yield nodes, gen.service_deps
+        await asyncio.sleep(delay)
+
+
+async def _failing_stream(count):
+    async for item in _cluster_stream(count):
+        yield item
+    raise RuntimeError("watch connection lost")
+
+
+def test_latest_queue_evicts_oldest():
+    async def scenario():
+        queue = LatestQueue(2)
+        for item in range(5):
+            queue.put_nowait(item)
+        return queue.dropped, [await queue.get(), await queue.get()]
+
+    assert asyncio.run(scenario()) == (3, [3, 4])
+
+
+def test_pipeline_processes_every_snapshot_when_keeping_up():
+    pipeline = DetectionPipeline(maxdim=0)
+    stats = asyncio.run(pipeline.run(_cluster_stream(4, delay=0.05)))
+    assert stats["processed"] == 4
+    assert stats["dropped"] == 0
+    assert stats["latency_max_s"] >= stats["latency_p50_s"] > 0
+
+
+def test_pipeline_drops_stale_snapshots_when_behind():
+    metrics = MetricsRegistry()
+    pipeline = DetectionPipeline(topology=SlowTopology(), maxdim=0, metrics=metrics)
+    stats = asyncio.run(pipeline.run(_cluster_stream(20)))
+    assert stats["dropped"] > 0
+    assert stats["processed"] + stats["dropped"] == 20
+    assert "tdak_snapshots_dropped_total" in metrics.render()
+
+
+def test_source_errors_propagate_instead_of_hanging():
+    pipeline = DetectionPipeline(maxdim=0)
+    with pytest.raises(RuntimeError, match="watch connection lost"):
+        asyncio.run(asyncio.wait_for(pipeline.run(_failing_stream(2)), timeout=10))
+    assert pipeline.processed <= 2
+
+
+def test_alerts_reach_sync_and_async_sinks():
+    seen, awaited = [], []
+
+    async def async_sink(alert):
+        awaited.append(alert.seq)
+
+    pipeline = DetectionPipeline(analyzer=AlwaysZoneOutage(), maxdim=0,
+                                 sinks=[seen.append, async_sink])
+    stats = asyncio.run(pipeline.run(_cluster_stream(3, delay=0.05)))
+    # The first snapshot only establishes the baseline
+    assert stats["alerts"] == 2
+    assert [a.seq for a in seen] == awaited == [1, 2]
+    assert all(a.failure_type == "zone_outage" and a.latency > 0 for a in seen)
+    assert "network" in seen[0].report
+
+
+def test_poll_snapshots_freezes_live_state():
+    async def scenario():
+        state = ClusterState()
+        state.apply_node("ADDED", {"metadata": {"name": "node-a", "labels": {}},
+                                   "status": {"conditions": []}})
+        stream = poll_snapshots(state, interval=0)
+        first = await stream.__anext__()
+        state.nodes["node-a"].cpu_load = 0.9
+        second = await stream.__anext__()
+        await stream.aclose()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert isinstance(first, Snapshot) and second.seq == first.seq + 1
+    assert first.nodes.cpu_load[0] == 0.0
+    assert abs(second.nodes.cpu_load[0] - 0.9) < 1e-6
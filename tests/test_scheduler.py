@@ -0,0 +1,63 @@
+# tests/test_scheduler.py
+from tdak.metrics import MetricsRegistry
+from tdak.network import ClusterGenerator
+from tdak.scheduler import TieredScheduler
+
+
+def _cluster(seed=0):
+    gen = ClusterGenerator(4, seed=seed)
+    return gen, gen.generate_cluster(as_table=True)
+
+
+def test_quiet_cluster_is_screened_with_periodic_full_runs():
+    gen, nodes = _cluster()
+    scheduler = TieredScheduler(maxdim=1, full_every=5)
+    tiers = [scheduler.tick(nodes, gen.service_deps).tier for _ in range(11)]
+    assert tiers == ['full'] + ['screen'] * 4 + ['full'] + ['screen'] * 4 + ['full']
+    stats = scheduler.stats()
+    assert stats["escalations"] == 0
+    assert stats["reasons"] == {'seed': 1, 'periodic': 2}
+    assert stats["tiers"]["screen"]["runs"] == 11 and stats["tiers"]["full"]["runs"] == 3
+    # Quiet screened ticks train the outlier model
+    detector = scheduler.analyzer.outlier_detector
+    assert detector.count == 8 * len(nodes)
+    assert len(detector.detect(nodes)["mahalanobis"]) == len(nodes)
+
+
+def test_zone_outage_trips_screen_and_escalates():
+    gen, nodes = _cluster(seed=1)
+    metrics = MetricsRegistry()
+    scheduler = TieredScheduler(maxdim=1, full_every=100, metrics=metrics)
+    for _ in range(3):
+        scheduler.tick(nodes, gen.service_deps)
+    failed = gen.inject_failure(nodes, 'zone_outage')
+    tick = scheduler.tick(failed, gen.service_deps)
+    assert tick.tier == 'full' and tick.report is not None
+    assert {'metric_h0', 'network_h0', 'dependencies'} & set(tick.reasons)
+    assert scheduler.stats()["escalations"] == 1
+    assert 'tdak_full_tier_runs_total' in metrics.render()
+    # The failing snapshot does not become the reference
+    assert scheduler.tick(failed, gen.service_deps).tier == 'full'
+
+
+def test_cleared_persistent_change_becomes_the_new_reference():
+    gen, nodes = _cluster()
+    scheduler = TieredScheduler(maxdim=1, full_every=100, rebaseline_after=3)
+    scheduler.tick(nodes, gen.service_deps)
+    scaled_down = gen.service_deps.copy()
+    scaled_down.active[::3] = False  # about a third of the dependencies, for good
+    ticks = [scheduler.tick(nodes, scaled_down) for _ in range(8)]
+    assert all(not t.detected for t in ticks)
+    assert [t.tier for t in ticks] == ['full'] * 3 + ['screen'] * 5
+    assert scheduler.stats()["escalations"] == 3
+
+
+def test_full_tier_over_budget_drops_a_dimension():
+    gen, nodes = _cluster()
+    scheduler = TieredScheduler(maxdim=2, full_budget=0.0)
+    first = scheduler.tick(nodes, gen.service_deps)
+    assert first.reasons == ['seed'] and scheduler.full_maxdim == 1
+    # The deeper reference was dropped, so the next tick reseeds at H1
+    assert scheduler.tick(nodes, gen.service_deps).reasons == ['seed']
+    assert scheduler.full_maxdim == 1
+    assert scheduler.stats()["tiers"]["full"]["overruns"] == 2
@@ -0,0 +1,111 @@
+# tests/test_signatures.py
+import numpy as np
+import pytest
+from tdak.analysis import ClusterAnalyzer
+from tdak.network import ClusterGenerator
+from tdak.signatures import (SignatureIndex, SignatureVectorizer, betti_curves,
+                             persistence_images, persistence_landscapes)
+from tdak.topology import TopologyAnalyzer
+
+
+@pytest.fixture
+def diagrams():
+    rng = np.random.default_rng(0)
+    out = []
+    for size in rng.integers(0, 15, 40):
+        births = rng.uniform(0, 1, size)
+        out.append(np.column_stack([births, births + rng.exponential(0.5, size)]))
+    return out
+
+
+def test_betti_curves_count_alive_points(diagrams):
+    grid = np.linspace(0, 2, 25)
+    curves = betti_curves(diagrams, grid)
+    expected = [[((d[:, 0] <= t) & (t < d[:, 1])).sum() for t in grid] for d in diagrams]
+    assert np.array_equal(curves, expected)
+
+
+def test_landscapes_match_sorted_tents(diagrams):
+    grid = np.linspace(0, 2, 25)
+    landscapes = persistence_landscapes(diagrams, grid, k=3, chunk_size=7)
+    for d, got in zip(diagrams, landscapes):
+        tents = np.maximum(0, np.minimum(grid - d[:, :1], d[:, 1:] - grid))
+        tents = np.vstack([tents, np.zeros((3, len(grid)))])
+        assert np.allclose(got, -np.sort(-tents, axis=0)[:3])
+
+
+def test_persistence_images_are_batched(diagrams):
+    images = persistence_images(diagrams, (0, 1), (0, 2), resolution=8)
+    assert images.shape == (40, 8, 8)
+    single = persistence_images(diagrams[3:4], (0, 1), (0, 2), resolution=8)
+    assert np.allclose(images[3], single[0])
+    assert not images[[i for i, d in enumerate(diagrams) if not len(d)]].any()
+
+
+def test_chunks_are_bounded_by_memory(diagrams, monkeypatch):
+    import tdak.signatures as signatures
+
+    grid = np.linspace(0, 2, 25)
+    widest = max(len(d) for d in diagrams)
+    budget = 4 * widest * len(grid) * 8
+    seen, padded = [], signatures._padded
+
+    def recording(chunk, min_points=1):
+        seen.append(len(chunk))
+        return padded(chunk, min_points)
+
+    monkeypatch.setattr(signatures, "_padded", recording)
+    bounded = persistence_landscapes(diagrams, grid, k=3, max_bytes=budget)
+    assert max(seen) == 4
+    assert np.allclose(bounded, persistence_landscapes(diagrams, grid, k=3))
+    images = persistence_images(diagrams, (0, 1), (0, 2), resolution=8, max_bytes=1)
+    assert np.allclose(images, persistence_images(diagrams, (0, 1), (0, 2), resolution=8))
+
+
+def test_index_classifies_by_nearest_signatures():
+    rng = np.random.default_rng(1)
+    centers = {"a": np.zeros(40), "b": np.full(40, 3.0)}
+    labels = rng.choice(list(centers), 2000)
+    vectors = np.array([centers[lab] for lab in labels]) + rng.normal(size=(2000, 40))
+    index = SignatureIndex(n_components=8).add(vectors, labels)
+    predicted, confidence = index.classify(np.vstack([centers["a"], centers["b"]]))
+    assert predicted == ["a", "b"]
+    assert (confidence > 0.9).all()
+
+
+def test_index_round_trips_through_disk(tmp_path):
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(50, 128))
+    index = SignatureIndex().add(vectors, ["x"] * 25 + ["y"] * 25)
+    index.vectorizer.scales[("network", 0)] = 0.1
+    index.save(tmp_path / "signatures.npz")
+    loaded = SignatureIndex.load(tmp_path / "signatures.npz")
+    assert loaded.vectorizer.scales == index.vectorizer.scales
+    assert np.array_equal(loaded.query(vectors[:3])[1], index.query(vectors[:3])[1])
+
+
+def _incident(topo, seed, failure_type):
+    gen = ClusterGenerator(3, seed=seed)
+    nodes = gen.generate_cluster(as_table=True)
+    before = (topo.compute_metric_persistence(nodes, maxdim=1),
+              topo.compute_network_persistence(gen.service_deps, maxdim=1))
+    failed = gen.inject_failure(nodes, failure_type)
+    after = (topo.compute_metric_persistence(failed, maxdim=1),
+             topo.compute_network_persistence(gen.service_deps, maxdim=1))
+    return {"metric": (before[0], after[0]), "network": (before[1], after[1])}, failed
+
+
+def test_analyzer_reports_nearest_signature():
+    topo = TopologyAnalyzer()
+    types = ["zone_outage", "network_congestion"]
+    train = [(_incident(topo, seed, ft)[0], ft) for seed in range(15) for ft in types]
+    index = SignatureIndex.from_incidents([i for i, _ in train], [ft for _, ft in train],
+                                          SignatureVectorizer(resolution=8))
+    analyzer = ClusterAnalyzer(signature_index=index)
+
+    incident, failed = _incident(topo, 99, "zone_outage")
+    report = analyzer.analyze(incident["metric"][0], incident["metric"][1],
+                              incident["network"][0], incident["network"][1], None, failed)
+    assert report["classification"]["failure_type"] == "zone_outage"
+    assert analyzer.validate_signature(report, "zone_outage")
+    assert not analyzer.validate_signature(report, "network_congestion")
@@ -0,0 +1,112 @@
+# tests/test_store.py
+import os
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pytest
+from tdak.network import ClusterGenerator
+from tdak.store import SnapshotStore
+from tdak.topology import TopologyAnalyzer
+
+T0 = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def cluster():
+    gen = ClusterGenerator(3, seed=0)
+    return gen.generate_cluster(as_table=True), gen.service_deps
+
+
+def _fill(path, cluster, count=4):
+    nodes, deps = cluster
+    with SnapshotStore(path, 'a') as store:
+        for i in range(count):
+            store.append(T0 + timedelta(minutes=i), nodes, deps)
+
+
+def test_round_trip_is_zero_copy(tmp_path, cluster):
+    nodes, deps = cluster
+    _fill(tmp_path, cluster)
+    store = SnapshotStore(tmp_path)
+    assert len(store) == 4
+
+    loaded = store.nodes(2)
+    assert np.shares_memory(loaded.metrics, store.maps['node_metrics'])
+    assert np.array_equal(loaded.metrics, nodes.metrics)
+    assert loaded.to_nodes() == nodes.to_nodes()
+    assert store.dependencies(1).to_dependencies() == deps.to_dependencies()
+    with pytest.raises(ValueError):
+        loaded.metrics[0, 0] = 1.0
+
+
+def test_search_by_timestamp(tmp_path, cluster):
+    _fill(tmp_path, cluster)
+    store = SnapshotStore(tmp_path)
+    assert list(store.search(T0 + timedelta(minutes=1), T0 + timedelta(minutes=3))) == [1, 2]
+    assert list(store.search(start=np.datetime64('2024-01-01T00:02'))) == [2, 3]
+    assert store.timestamps[0] == np.datetime64(T0)
+
+
+def test_append_rules(tmp_path, cluster):
+    nodes, deps = cluster
+    _fill(tmp_path, cluster, count=1)
+    with pytest.raises(PermissionError):
+        SnapshotStore(tmp_path).append(T0, nodes, deps)
+    with pytest.raises(ValueError):
+        SnapshotStore(tmp_path, 'a').append(T0 - timedelta(seconds=1), nodes, deps)
+
+
+def test_aware_timestamps_are_stored_in_utc(tmp_path, cluster):
+    nodes, deps = cluster
+    noon_cest = datetime(2024, 1, 1, 12, 0, tzinfo=timezone(timedelta(hours=2)))
+    with SnapshotStore(tmp_path, 'a') as store:
+        store.append(noon_cest, nodes, deps)
+        store.append(datetime(2024, 1, 1, 10, 30), nodes, deps)  # naive UTC, later
+    assert SnapshotStore(tmp_path).timestamps[0] == np.datetime64('2024-01-01T10:00')
+
+
+def test_diagram_points_are_float32(tmp_path, cluster):
+    _fill(tmp_path, cluster, count=1)
+    store = SnapshotStore(tmp_path, 'a')
+    store.put_diagrams(0, 'metric', [np.array([[0, 0.3]])])
+    [h0] = SnapshotStore(tmp_path).diagrams(0, 'metric')
+    assert h0.dtype == np.float32 and h0[0, 1] == np.float32(0.3)
+
+
+def test_latest_diagrams_win(tmp_path, cluster):
+    _fill(tmp_path, cluster, count=2)
+    store = SnapshotStore(tmp_path, 'a')
+    assert store.diagrams(0, 'metric') is None
+    store.put_diagrams(0, 'metric', [np.array([[0, 1.0]]), np.empty((0, 2))])
+    store.put_diagrams(0, 'metric', [np.array([[0, 2.0], [0, 3.0]])])
+    [h0] = SnapshotStore(tmp_path).diagrams(0, 'metric')
+    assert h0.tolist() == [[0, 2.0], [0, 3.0]]
+
+
+def test_uncommitted_writes_are_discarded(tmp_path, cluster):
+    nodes, deps = cluster
+    _fill(tmp_path, cluster, count=2)
+    # Simulate a crash after some columns of a third snapshot were written
+    with open(os.path.join(tmp_path, 'node_names.bin'), 'ab') as f:
+        f.write(b'\0' * 100)
+    with open(os.path.join(tmp_path, 'index.bin'), 'ab') as f:
+        f.write(b'\1' * 10)
+
+    store = SnapshotStore(tmp_path, 'a')
+    assert len(store) == 2
+    store.append(T0 + timedelta(hours=1), nodes, deps)
+    assert SnapshotStore(tmp_path).nodes(2).to_nodes() == nodes.to_nodes()
+
+
+def test_replay_computes_missing_diagrams_once(tmp_path, cluster, monkeypatch):
+    _fill(tmp_path, cluster, count=3)
+    topo = TopologyAnalyzer()
+    first = list(SnapshotStore(tmp_path, 'a').replay(topology=topo, maxdim=1))
+    assert all(len(dgms['metric']) == 2 for _, _, _, dgms in first)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("diagrams should come from the store")
+    monkeypatch.setattr(topo, 'compute_metric_persistence', fail)
+    monkeypatch.setattr(topo, 'compute_network_persistence', fail)
+    second = list(SnapshotStore(tmp_path).replay(topology=topo))
+    for (_, _, _, a), (_, _, _, b) in zip(first, second):
+        assert all(np.allclose(x, y) for x, y in zip(a['network'], b['network']))
@@ -0,0 +1,75 @@
+# tests/test_synthetic.py
+import numpy as np
+import pytest
+from scipy.sparse import coo_matrix
+from tdak.store import SnapshotStore
+from tdak.synthetic import SyntheticClusterGenerator
+from tdak.topology import TopologyAnalyzer
+
+
+def test_seeded_generation_is_reproducible():
+    a = SyntheticClusterGenerator(2000, seed=3)
+    b = SyntheticClusterGenerator(2000, seed=3)
+    nodes_a, nodes_b = a.generate_cluster(), b.generate_cluster()
+    assert np.array_equal(nodes_a.names, nodes_b.names)
+    assert np.array_equal(nodes_a.metrics, nodes_b.metrics)
+    assert np.array_equal(a.service_deps.sources, b.service_deps.sources)
+    assert np.array_equal(a.service_deps.latency_ms, b.service_deps.latency_ms)
+
+
+def test_mesh_has_heavy_tailed_in_degree_and_cross_zone_ratio():
+    gen = SyntheticClusterGenerator(20000, num_zones=4, mean_degree=8, cross_zone=0.3, seed=0)
+    nodes = gen.generate_cluster()
+    deps = gen.service_deps
+    assert len(deps) > 100000
+    assert not (deps.sources == deps.targets).any()
+    assert len(np.unique(deps.sources.astype(np.int64) * len(nodes) + deps.targets)) == len(deps)
+    in_degree = np.bincount(deps.targets, minlength=len(nodes))
+    assert in_degree.max() > 50 * np.median(in_degree)
+    crossing = nodes.zone_codes[deps.sources] != nodes.zone_codes[deps.targets]
+    assert crossing.mean() == pytest.approx(0.3, abs=0.03)
+    assert deps.latency_ms[crossing].mean() > deps.latency_ms[~crossing].mean()
+
+
+def test_layered_topology_is_a_dag_rooted_at_ingress():
+    gen = SyntheticClusterGenerator(5000, topology='layered', layers=4, seed=1)
+    nodes = gen.generate_cluster()
+    deps = gen.service_deps
+    ingress = nodes.service_mask.astype(bool)
+    assert ingress.any() and not ingress[deps.targets].any()
+    # Kahn's algorithm consumes every node only if there is no cycle
+    graph = coo_matrix((np.ones(len(deps)), (deps.sources, deps.targets)),
+                       shape=(len(nodes),) * 2).tocsr()
+    indegree = np.bincount(deps.targets, minlength=len(nodes))
+    frontier, seen = list(np.flatnonzero(indegree == 0)), 0
+    while frontier:
+        node = frontier.pop()
+        seen += 1
+        for child in graph.indices[graph.indptr[node]:graph.indptr[node + 1]]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+                frontier.append(child)
+    assert seen == len(nodes)
+
+
+def test_output_feeds_persistence_and_failure_injection():
+    gen = SyntheticClusterGenerator(300, seed=2)
+    nodes = gen.generate_cluster()
+    failed = gen.inject_failure(nodes, 'zone_outage')
+    assert 0 < len(failed) < len(nodes)
+    dgms = TopologyAnalyzer().compute_network_persistence(gen.service_deps, sparse=True, maxdim=0)
+    assert len(dgms[0])
+
+
+def test_stream_to_store_appends_drifting_snapshots(tmp_path):
+    gen = SyntheticClusterGenerator(500, seed=4)
+    with SnapshotStore(tmp_path / 'history', 'a') as store:
+        ids = gen.stream_to_store(store, 5, failure_type='storage_failure', failure_at=3)
+    store = SnapshotStore(tmp_path / 'history')
+    assert ids == list(range(5)) and len(store) == 5
+    first, second = store.nodes(0), store.nodes(1)
+    assert np.array_equal(first.names, second.names)
+    assert not np.array_equal(first.metrics, second.metrics)
+    assert first.metrics[:, 3].max() <= 1
+    assert (store.nodes(3).metrics[:, 3] == 1.0).sum() > (first.metrics[:, 3] == 1.0).sum()
+    assert len(store.dependencies(4)) == len(gen.service_deps)
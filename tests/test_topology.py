@@ -3,7 +3,8 @@ import numpy as np
 from datetime import datetime
 from tdak.network import ServiceDependency
 from tdak.topology import TopologyAnalyzer
-from tdak.network import Node
+from tdak.network import ClusterGenerator, DependencyTable, Node, NodeTable
+from tdak.utils import Standardizer
 
 class TestTopologyAnalyzer:
     def setup_method(self):
@@ -37,6 +38,340 @@ class TestTopologyAnalyzer:
         diagrams = self.analyzer.compute_network_persistence([])
         assert len(diagrams[0]) == 0, "No nodes, no components"
 
+    def test_sparse_network_persistence_matches_dense(self):
+        """Sparse filtration yields the same diagrams as the dense matrix"""
+        rng = np.random.default_rng(1)
+        deps = [
+            ServiceDependency(f"svc{a}", f"svc{b}", float(rng.uniform(1, 200)))
+            for a, b in rng.integers(0, 12, (60, 2)) if a != b
+        ]
+        dense = self.analyzer.compute_network_persistence(deps)
+        sparse = self.analyzer.compute_network_persistence(deps, sparse=True)
+
+        assert len(dense) == len(sparse)
+        for d, s in zip(dense, sparse):
+            assert d.shape == s.shape
+            assert np.allclose(np.sort(d, axis=0), np.sort(s, axis=0))
+
+    def test_metric_h0_engine_matches_ripser(self):
+        """Euclidean MST gives the same H0 pairs as the full Rips run"""
+        rng = np.random.default_rng(3)
+        nodes = [
+            self._create_node(f"node{i}", *rng.uniform(0, 1, 2))
+            for i in range(40)
+        ]
+        for i, node in enumerate(nodes):
+            node.storage_usage = float(rng.uniform(0, 1))
+            node.running_pods = int(rng.poisson(3))
+
+        full = self.analyzer.compute_metric_persistence(nodes)
+        fast = self.analyzer.compute_metric_persistence(nodes, maxdim=0)
+        assert len(fast) == 1
+        assert np.allclose(np.sort(full[0][:, 1]), fast[0][:, 1], atol=1e-5)
+
+    def test_network_h0_engine_matches_ripser(self):
+        """Kruskal over the edge list gives the same H0 pairs as ripser"""
+        rng = np.random.default_rng(2)
+        deps = [
+            ServiceDependency(f"svc{a}", f"svc{b}", float(rng.uniform(1, 200)))
+            for a, b in rng.integers(0, 25, (30, 2)) if a != b
+        ]
+        full = self.analyzer.compute_network_persistence(deps)
+        fast = self.analyzer.compute_network_persistence(deps, maxdim=0)
+        assert len(fast) == 1
+        assert np.allclose(np.sort(full[0][:, 1]), fast[0][:, 1], atol=1e-5)
+
+    def test_maxdim_selects_diagram_count(self):
+        """Callers only get (and pay for) the dimensions they ask for"""
+        nodes = [self._create_node(f"node{i}", i / 10, 0.5) for i in range(5)]
+        assert len(self.analyzer.compute_metric_persistence(nodes, maxdim=1)) == 2
+        assert len(self.analyzer.compute_network_persistence([], maxdim=1)) == 2
+
+    def test_approximate_metric_persistence_within_bound(self):
+        """Landmark diagrams stay within the reported bottleneck bound"""
+        from persim import bottleneck
+
+        rng = np.random.default_rng(4)
+        nodes = [
+            self._create_node(f"node{i}", *rng.uniform(0, 1, 2))
+            for i in range(150)
+        ]
+        full = self.analyzer.compute_metric_persistence(nodes, maxdim=1)
+        approx = self.analyzer.compute_approximate_metric_persistence(nodes, n_landmarks=30)
+
+        assert len(approx['landmarks']) == 30
+        assert approx['error_bound'] == 2 * approx['hausdorff']
+        for exact, sampled in zip(full, approx['dgms']):
+            assert bottleneck(exact, sampled) <= approx['error_bound'] + 1e-6
+
+    def test_approximate_metric_persistence_error_budget(self):
+        """An error budget picks as many landmarks as it needs"""
+        rng = np.random.default_rng(5)
+        nodes = [
+            self._create_node(f"node{i}", *rng.uniform(0, 1, 2))
+            for i in range(100)
+        ]
+        approx = self.analyzer.compute_approximate_metric_persistence(nodes, max_error=0.5)
+        assert approx['error_bound'] <= 0.5
+
+    def test_cache_skips_ripser_on_repeat(self, monkeypatch):
+        """Identical snapshots are served from the cache"""
+        import ripser
+
+        analyzer = TopologyAnalyzer(cache_size=4)
+        nodes = [self._create_node(f"node{i}", i / 10, 0.5) for i in range(6)]
+        first = analyzer.compute_metric_persistence(nodes)
+        first_net = analyzer.compute_network_persistence(self.deps)
+
+        def fail(*args, **kwargs):
+            raise AssertionError("ripser should not run on a cache hit")
+        monkeypatch.setattr(ripser, "ripser", fail)
+
+        again = analyzer.compute_metric_persistence(list(nodes))
+        again_net = analyzer.compute_network_persistence(list(self.deps))
+        assert all(np.array_equal(a, b) for a, b in zip(first, again))
+        assert all(np.array_equal(a, b) for a, b in zip(first_net, again_net))
+        assert analyzer.cache.info().hits == 2
+        assert analyzer.cache.info().misses == 2
+
+    def test_cache_evicts_least_recently_used(self):
+        """Cache size stays bounded"""
+        analyzer = TopologyAnalyzer(cache_size=2)
+        for k in range(3):
+            nodes = [self._create_node(f"node{i}", (i + k) / 10, 0.5) for i in range(4)]
+            analyzer.compute_metric_persistence(nodes, maxdim=0)
+        info = analyzer.cache.info()
+        assert info.currsize == 2
+        assert info.misses == 3
+
+    def test_node_table_matches_node_list(self):
+        """Columnar input yields the same diagrams as a list of Nodes"""
+        rng = np.random.default_rng(6)
+        nodes = [
+            self._create_node(f"node{i}", *rng.uniform(0, 1, 2))
+            for i in range(30)
+        ]
+        from_list = self.analyzer.compute_metric_persistence(nodes, maxdim=1)
+        from_table = self.analyzer.compute_metric_persistence(NodeTable.from_nodes(nodes), maxdim=1)
+        for a, b in zip(from_list, from_table):
+            assert a.shape == b.shape
+            assert np.allclose(a, b, atol=1e-5)
+
+    def test_dependency_table_matches_dependency_list(self):
+        """Columnar dependencies yield the same network diagrams"""
+        rng = np.random.default_rng(1)
+        deps = [
+            ServiceDependency(f"svc{a}", f"svc{b}", float(rng.uniform(1, 200)), bool(rng.random() < 0.8))
+            for a, b in rng.integers(0, 12, (60, 2)) if a != b
+        ]
+        table = DependencyTable.from_dependencies(deps)
+        for a, b in zip(self.analyzer.compute_network_persistence(deps),
+                        self.analyzer.compute_network_persistence(table)):
+            assert np.allclose(np.sort(a, axis=0), np.sort(b, axis=0))
+
+    def test_incremental_update_matches_full_recompute(self):
+        """Dynamic MST H0 tracks latency changes, flips and new dependencies"""
+        rng = np.random.default_rng(2)
+        deps = {}
+        for a, b in rng.integers(0, 40, (150, 2)):
+            if a != b:
+                deps[(a, b)] = ServiceDependency(f"svc{a}", f"svc{b}", float(rng.uniform(1, 300)))
+        deps = list(deps.values())
+        nodes = [self._create_node(f"n{i}", float(c), float(m))
+                 for i, (c, m) in enumerate(rng.random((20, 2)))]
+        state = self.analyzer.persistence_state(nodes, deps, maxdim=0)
+
+        for step in range(40):
+            changed = [deps[i] for i in rng.choice(len(deps), 3, replace=False)]
+            for sd in changed:
+                if rng.random() < 0.3:
+                    sd.active = not sd.active
+                else:
+                    sd.latency_ms = float(rng.uniform(1, 300))
+            if step % 10 == 0:
+                new = ServiceDependency(f"svc{step}", f"svc{step + 40}", 20.0)
+                deps.append(new)
+                changed.append(new)
+            _, network = self.analyzer.update(state, changed_edges=changed, max_delta=0.1)
+            expected = self.analyzer.compute_network_persistence(deps, maxdim=0)
+            assert np.allclose(network[0], expected[0])
+        assert state.updates == {'incremental': 40, 'full': 0}
+
+    def test_reactivated_dependency_keeps_its_list_position(self):
+        """With a -> b and b -> a both listed, the later entry wins after toggling"""
+        deps = [ServiceDependency("a", "b", 10.0), ServiceDependency("b", "a", 200.0),
+                ServiceDependency("b", "c", 50.0), ServiceDependency("c", "a", 80.0)]
+        nodes = [self._create_node("n0", 0.1, 0.1)]
+        state = self.analyzer.persistence_state(nodes, deps, maxdim=0)
+        for active in (False, True, False, True):
+            deps[0].active = active
+            _, network = self.analyzer.update(state, changed_edges=[deps[0]], max_delta=1.0)
+            expected = self.analyzer.compute_network_persistence(deps, maxdim=0)
+            assert np.allclose(np.sort(network[0], axis=0), np.sort(expected[0], axis=0))
+
+    def test_self_loops_are_ignored_everywhere(self):
+        """Full, sharded and incremental network persistence agree on self-loops"""
+        deps = [ServiceDependency(f"svc{i}", f"svc{i + 1}", 10.0 * (i + 1)) for i in range(5)]
+        loops = deps + [ServiceDependency("svc2", "svc2", 1.0), ServiceDependency("svc9", "svc9", 3.0)]
+        table = DependencyTable.from_dependencies(loops)
+        for maxdim in (0, 1):
+            expected = self.analyzer.compute_network_persistence(deps, sparse=True, maxdim=maxdim)
+            for looped in (loops, table):
+                got = self.analyzer.compute_network_persistence(looped, sparse=True, maxdim=maxdim)
+                for a, b in zip(got, expected):
+                    assert np.allclose(np.sort(a, axis=0), np.sort(b, axis=0))
+        nodes = [self._create_node(f"n{i}", 0.1 * i, 0.1) for i in range(3)]
+        state = self.analyzer.persistence_state(nodes, loops, maxdim=0)
+        assert np.allclose(np.sort(state.network[0], axis=0),
+                           np.sort(self.analyzer.compute_network_persistence(loops, maxdim=0)[0], axis=0))
+
+    def test_incremental_update_metric_and_fallback(self):
+        """Changed nodes refresh the metric diagrams; large deltas rebuild the forest"""
+        nodes = [self._create_node(f"n{i}", 0.1 * i, 0.05 * i) for i in range(8)]
+        deps = [ServiceDependency(f"n{i}", f"n{i + 1}", 10.0 * (i + 1)) for i in range(7)]
+        state = self.analyzer.persistence_state(nodes, deps, maxdim=1)
+
+        nodes[3].cpu_load = 0.95
+        for sd in deps[:4]:
+            sd.latency_ms = 5.0
+        metric, network = self.analyzer.update(state, [nodes[3]], deps[:4])
+        for got, want in zip(metric, self.analyzer.compute_metric_persistence(nodes, maxdim=1)):
+            assert np.allclose(got, want)
+        for got, want in zip(network, self.analyzer.compute_network_persistence(deps, maxdim=1)):
+            assert np.allclose(np.sort(got, axis=0), np.sort(want, axis=0))
+        assert state.updates == {'incremental': 0, 'full': 1}
+
+    def test_frozen_metric_tree_is_repaired_in_place(self):
+        """Frozen scaling repairs metric H0 across moves, arrivals and removals"""
+        rng = np.random.default_rng(5)
+        nodes = [self._create_node(f"n{i}", float(c), float(m))
+                 for i, (c, m) in enumerate(rng.random((200, 2)))]
+        deps = [ServiceDependency(f"n{i}", f"n{i + 1}", 10.0 + i) for i in range(199)]
+        analyzer = TopologyAnalyzer(normalization='frozen')
+        state = analyzer.persistence_state(nodes, deps, maxdim=0)
+        reference = TopologyAnalyzer(normalization='frozen').fit_normalization(nodes)
+
+        for step in range(10):
+            changed = [nodes[i] for i in rng.choice(len(nodes), 3, replace=False)]
+            for n in changed:
+                n.cpu_load = float(rng.random())
+            new = self._create_node(f"new{step}", float(rng.random()), 0.5)
+            nodes.append(new)
+            gone = nodes.pop(int(rng.integers(len(nodes) - 1)))
+            metric, _ = analyzer.update(state, changed + [new], removed_nodes=[gone.name],
+                                       max_delta=0.05)
+            expected = reference.compute_metric_persistence(nodes, maxdim=0)
+            assert np.allclose(metric[0], expected[0])
+        assert len(state.features) == len(nodes)
+
+    def test_removed_nodes_and_edges_match_full_recompute(self):
+        """A zone outage goes through update; removed edges re-enter at the end"""
+        deps, zone_of = self._zoned_dependencies()
+        nodes = [self._create_node(name, 0.1 * (i % 7), 0.3) for i, name in enumerate(zone_of)]
+        state = self.analyzer.persistence_state(nodes, deps, maxdim=0)
+
+        dead = [name for name, zone in zone_of.items() if zone == "z1"]
+        deps = [sd for sd in deps if sd.source not in dead and sd.target not in dead]
+        nodes = [n for n in nodes if n.name not in dead]
+        metric, network = self.analyzer.update(state, removed_nodes=dead, max_delta=1.0)
+        assert np.allclose(metric[0], self.analyzer.compute_metric_persistence(nodes, maxdim=0)[0])
+        assert np.allclose(network[0], self.analyzer.compute_network_persistence(deps, maxdim=0)[0])
+        assert set(state.node_index) == {n.name for n in nodes}
+
+        first = deps.pop(0)
+        _, network = self.analyzer.update(state, removed_edges=[(first.source, first.target)],
+                                          max_delta=1.0)
+        assert np.allclose(network[0], self.analyzer.compute_network_persistence(deps, maxdim=0)[0])
+        deps.append(first)
+        _, network = self.analyzer.update(state, changed_edges=[first], max_delta=1.0)
+        assert np.allclose(network[0], self.analyzer.compute_network_persistence(deps, maxdim=0)[0])
+
+    def _zoned_dependencies(self, zones=4, size=12, seed=3):
+        rng = np.random.default_rng(seed)
+        zone_of = {f"z{z}-n{i}": f"z{z}" for z in range(zones) for i in range(size)}
+        deps = [ServiceDependency(f"z{z}-n{a}", f"z{z}-n{b}", float(rng.uniform(1, 100)))
+                for z in range(zones) for a, b in rng.integers(0, size, (3 * size, 2)) if a != b]
+        # A chain of cross-zone links, so every cycle stays inside one zone
+        deps += [ServiceDependency(f"z{z}-n0", f"z{z + 1}-n1", 150.0) for z in range(zones - 1)]
+        return deps, zone_of
+
+    def test_sharded_network_persistence_matches_global(self):
+        """Merged H0 is exact; H1 too when no cycle crosses zones"""
+        deps, zone_of = self._zoned_dependencies()
+        full = self.analyzer.compute_network_persistence(deps, sparse=True, maxdim=1)
+        for n_jobs in (1, 2):
+            sharded = self.analyzer.compute_sharded_network_persistence(deps, zone_of, maxdim=1,
+                                                                        n_jobs=n_jobs)
+            for a, b in zip(full, sharded):
+                assert np.allclose(np.sort(a, axis=0), np.sort(b, axis=0))
+
+    def test_sharded_h0_exact_with_cross_zone_cycles(self):
+        deps, zone_of = self._zoned_dependencies()
+        deps += [ServiceDependency(f"z{z}-n5", f"z{z + 2}-n7", 5.0) for z in range(2)]
+        nodes = [self._create_node(name, 0.5, 0.5) for name in zone_of]
+        for n, name in zip(nodes, zone_of):
+            n.zone = zone_of[name]
+        full = self.analyzer.compute_network_persistence(deps, maxdim=0)
+        sharded = self.analyzer.compute_sharded_network_persistence(deps, NodeTable.from_nodes(nodes),
+                                                                    maxdim=0)
+        assert np.allclose(full[0], sharded[0])
+
+    def test_sharded_cache_recomputes_only_changed_zone(self):
+        analyzer = TopologyAnalyzer(cache_size=16)
+        deps, zone_of = self._zoned_dependencies()
+        analyzer.compute_sharded_network_persistence(deps, zone_of, maxdim=1)
+        deps[0].latency_ms = 0.5  # an intra-zone dependency of z0
+        analyzer.compute_sharded_network_persistence(deps, zone_of, maxdim=1)
+        info = analyzer.cache.info()
+        assert (info.hits, info.misses) == (3, 5)
+
+    def test_frozen_normalization_keeps_cluster_wide_shifts(self):
+        nodes = ClusterGenerator(3, seed=0).generate_cluster(as_table=True)
+        overloaded = nodes.copy()
+        overloaded.metrics[:, 0] *= 2  # every node's CPU doubles
+
+        per_snapshot = TopologyAnalyzer()
+        before = per_snapshot.compute_metric_persistence(nodes, maxdim=0)
+        after = per_snapshot.compute_metric_persistence(overloaded, maxdim=0)
+        frozen = TopologyAnalyzer(normalization='frozen').fit_normalization(nodes)
+        frozen_before = frozen.compute_metric_persistence(nodes, maxdim=0)
+        frozen_after = frozen.compute_metric_persistence(overloaded, maxdim=0)
+
+        assert np.allclose(frozen_before[0], before[0])
+        # Refitting rescales the doubled column back; a frozen reference does not
+        shift = np.abs(after[0][:, 1].sum() - before[0][:, 1].sum())
+        frozen_shift = np.abs(frozen_after[0][:, 1].sum() - frozen_before[0][:, 1].sum())
+        assert frozen_shift > 2 * shift
+
+    def test_streaming_normalization_statistics(self):
+        rng = np.random.default_rng(0)
+        batches = [rng.normal(i, 1 + i, (50, 4)) for i in range(3)]
+        pooled = Standardizer()
+        for batch in batches:
+            pooled.partial_fit(batch)
+        full = Standardizer().fit(np.vstack(batches))
+        assert np.allclose(pooled.mean_, full.mean_)
+        assert np.allclose(pooled.scale_, full.scale_)
+
+        ewm = Standardizer(alpha=0.5).fit(batches[0]).partial_fit(batches[1])
+        assert np.allclose(ewm.mean_, (batches[0].mean(0) + batches[1].mean(0)) / 2)
+
+        X = batches[2].copy()
+        assert pooled.transform(X, copy=False) is X
+        assert np.allclose(X, (batches[2] - full.mean_) / full.scale_)
+
+    def test_streaming_reference_is_part_of_cache_key(self):
+        nodes = [self._create_node(f"n{i}", 0.1 * i, 0.05 * i) for i in range(6)]
+        busy = [self._create_node(f"n{i}", 0.1 * i + 0.3, 0.05 * i) for i in range(6)]
+        counts = {}
+        for mode in ('frozen', 'partial_fit'):
+            analyzer = TopologyAnalyzer(cache_size=8, normalization=mode)
+            for snapshot in (nodes, busy, nodes):
+                analyzer.compute_metric_persistence(snapshot, maxdim=0)
+            counts[mode] = analyzer.cache.info().hits
+        # The pooled reference moved after ``busy``, so the repeat is a new key
+        assert counts == {'frozen': 1, 'partial_fit': 0}
+
     '''def _create_node(self, name, cpu_load, memory_usage):
         """Helper to create node objects"""
         return {
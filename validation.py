@@ -1,5 +1,44 @@
 # Track precision/recall over multiple runs
-confusion_matrix = {
-    'zone_outage': {'true_pos': 0, 'false_pos': 0, 'false_neg': 0},
-    # ... other failure types ...
-}
+import argparse
+import json
+from tdak.evaluation import MonteCarloEvaluator
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Monte Carlo precision/recall of tdak failure signatures")
+    parser.add_argument('--trials', type=int, default=1000,
+                        help='Maximum number of seeded trials')
+    parser.add_argument('--min-trials', type=int, default=100,
+                        help='Trials to run before early stopping is considered')
+    parser.add_argument('--ci-width', type=float, default=0.1,
+                        help='Stop once every 95%% interval is narrower than this')
+    parser.add_argument('--zones', type=int, default=3,
+                        help='Number of availability zones per cluster')
+    parser.add_argument('--jobs', type=int, default=-1,
+                        help='Worker processes (-1 = all cores)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', action='store_true',
+                        help='Print the raw summary as JSON')
+    args = parser.parse_args()
+
+    evaluator = MonteCarloEvaluator(num_zones=args.zones, n_jobs=args.jobs, seed=args.seed)
+    summary = evaluator.run(max_trials=args.trials, min_trials=args.min_trials,
+                            ci_width=args.ci_width)
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+
+    print(f"Trials: {summary['trials']}")
+    for ft, m in summary['failure_types'].items():
+        precision = 'n/a' if m['precision'] is None else f"{m['precision']:.2f}"
+        recall = 'n/a' if m['recall'] is None else f"{m['recall']:.2f}"
+        print(f"  {ft:<20} precision {precision:>5}  recall {recall:>5}  "
+              f"(tp={m['true_pos']} fp={m['false_pos']} fn={m['false_neg']})")
+    print("Stage timings:")
+    for stage, t in summary['stages'].items():
+        print(f"  {stage:<16} mean {t['mean_ms']:8.2f} ms  p95 {t['p95_ms']:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()